@@ -0,0 +1,272 @@
+import os, sys, json, zlib, gym, numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from Lobby import Lobby
+from Discretizer import StreetFighter2Discretizer
+
+class FakeEmulator():
+    """Stands in for the retro emulator core, it only remembers the buttons held for the next frame"""
+
+    def __init__(self, environment):
+        self.environment = environment
+
+    def set_button_mask(self, buttons, player= 0):
+        if player == 0: self.environment.heldButtons = buttons
+
+    def step(self):
+        self.environment.advanceFrame()
+
+class FakeGameData():
+    """Stands in for retro's game data, it works out the reward and done flag of each frame and looks up the RAM variables"""
+
+    def __init__(self, environment):
+        self.environment = environment
+
+    def update_ram(self):
+        self.environment.updateRewards()
+
+    def current_reward(self, player= 0):
+        return self.environment.reward
+
+    def is_done(self):
+        return self.environment.isDone
+
+    def lookup_all(self):
+        return dict(self.environment.ram)
+
+class FakeRetroEnvironment(gym.Env):
+    """A deterministic stand in for the Street Fighter II retro environment so the training platform can be benchmarked without the ROM.
+       It exposes the parts of retro's RetroEnv the Lobby and Discretizer use: the Genesis button layout, em, data,
+       compute_step, _update_obs, get_ram, players, action_to_array, load_state, initial_state, statename and viewer. Each frame it
+       simulates a simplified fight and reports every RAM field declared in data.json. Rounds open with the round
+       timer at its not started value, attacks and jumps put the player in statuses it cannot act in for a number of
+       frames, the enemy attacks at random, and the fight is done once either side wins two rounds as in scenario.json.
+       A knock out plays a sequence of frames nobody can act in before the round is counted, like the game's knock out
+       animation and win poses.
+       The random choices are seeded by the save state, so a state always plays out the same for the same inputs.
+       get_ram writes the variables at their data.json addresses as byte swapped 16 bit words, the way the Genesis
+       core keeps its RAM, so a RamDecoder has to find the swapped layout like it would on the real game.
+    """
+
+    BUTTONS = ['B', 'A', 'MODE', 'START', 'UP', 'DOWN', 'LEFT', 'RIGHT', 'C', 'Y', 'X', 'Z']   # The Genesis button layout retro uses
+    ATTACK_BUTTONS = ['X', 'Y', 'Z', 'A', 'B', 'C']
+    SCREEN_SHAPE = (224, 320, 3)
+    RAM_SIZE = 0x10000                                        # Bytes of Genesis work RAM retro returns as a RAM observation
+    RAM_BASE = 0xFF0000                                       # Address of the first byte of the work RAM
+    FULL_HEALTH = 176
+    ROUND_INTRO_FRAMES = 120                                  # Frames at the start of each round before the round timer starts
+    ATTACK_FRAMES = 16                                        # Frames an attack leaves the attacker unable to act
+    JUMP_FRAMES = 30                                          # Frames a jump lasts
+    HIT_STUN_FRAMES = 12                                      # Frames a hit leaves the defender unable to act
+    HIT_CHANCE = 0.2                                          # Chance an attack lands
+    MIN_DAMAGE = 2                                            # Range of the damage a landed attack deals
+    MAX_DAMAGE = 8
+    ENEMY_ATTACK_CHANCE = 0.05                                # Chance the enemy starts an attack on a frame it can act in
+    ATTACK_STATUS = 522                                       # Status codes reported during attacks and hit stun, neither is actionable
+    HIT_STUN_STATUS = 532
+    KNOCKED_OUT_STATUS = 540                                  # Status of both fighters while a knock out plays out
+    KNOCK_OUT_FRAMES = 240                                    # Frames between a knock out and the round being counted
+    WINS_NEEDED = 2
+
+    def __init__(self, state= 'ryu', ramObservations= False):
+        """Creates the environment in the given save state, the state's file is not read so only its name matters
+
+        Parameters
+        ----------
+        state
+            The name of the save state the environment starts in
+
+        ramObservations
+            A boolean flag that makes observations a copy of the RAM like retro.Observations.RAM instead of the screen
+
+        Returns
+        -------
+        None
+        """
+        self.buttons = FakeRetroEnvironment.BUTTONS
+        self.action_space = gym.spaces.MultiBinary(len(self.buttons))
+        self.ramObservations = ramObservations
+        observationShape = (FakeRetroEnvironment.RAM_SIZE,) if ramObservations else FakeRetroEnvironment.SCREEN_SHAPE
+        self.observation_space = gym.spaces.Box(low= 0, high= 255, shape= observationShape, dtype= numpy.uint8)
+        self.players = 1
+        self.em = FakeEmulator(self)
+        self.data = FakeGameData(self)
+        self.viewer = None
+        self.screen = numpy.zeros(FakeRetroEnvironment.SCREEN_SHAPE, dtype= numpy.uint8)
+        self.memory = numpy.zeros(FakeRetroEnvironment.RAM_SIZE, dtype= numpy.uint8)
+        self.attackMask = numpy.array([button in FakeRetroEnvironment.ATTACK_BUTTONS for button in self.buttons])
+        self.heldButtons = numpy.zeros(len(self.buttons), dtype= numpy.uint8)
+        dataPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'StreetFighterIISpecialChampionEdition-Genesis', 'data.json')
+        with open(dataPath) as file:
+            variables = json.load(file)['info']
+        self.infoFields = list(variables.keys())
+        # Where each byte of each field goes in the RAM and how far its field's value is shifted to get it
+        byteOffsets, byteFields, byteShifts = [], [], []
+        self.decimalFields = []                               # Indices of the binary coded decimal fields
+        for index, variable in enumerate(variables.values()):
+            kind, size = variable['type'][1], int(variable['type'][2:])
+            if kind == 'd': self.decimalFields.append(index)
+            for byte in range(size):
+                byteOffsets.append((variable['address'] - FakeRetroEnvironment.RAM_BASE + byte) ^ 1)
+                byteFields.append(index)
+                byteShifts.append(8 * (size - 1 - byte))
+        self.byteOffsets, self.byteFields, self.byteShifts = numpy.array(byteOffsets), numpy.array(byteFields), numpy.array(byteShifts)
+        self.load_state(state)
+        self.reset()
+
+    def load_state(self, statename):
+        """Uses the name of the save state as its contents, like retro this takes effect on the next reset"""
+        self.initial_state = statename.encode()
+        self.statename = statename + '.state'
+
+    def reset(self):
+        """Starts the fight of the current save state over"""
+        self.random = numpy.random.RandomState(zlib.crc32(self.initial_state))
+        self.ram = {field : 0 for field in self.infoFields}
+        self.ram['enemy_character'] = self.random.randint(0, 8)
+        self.frame = 0
+        self.startRound()
+        self.previousHealth, self.previousEnemyHealth = self.ram['health'], self.ram['enemy_health']
+        self.previousWins, self.previousEnemyWins = 0, 0
+        self.reward, self.isDone = 0, False
+        return self._update_obs()
+
+    def startRound(self):
+        """Puts both fighters back at full health in their starting positions"""
+        self.ram.update({'health' : FakeRetroEnvironment.FULL_HEALTH, 'enemy_health' : FakeRetroEnvironment.FULL_HEALTH,
+                         'x_position' : 150, 'y_position' : 192, 'enemy_x_position' : 250, 'enemy_y_position' : 192,
+                         'status' : Lobby.STANDING_STATUS, 'enemy_status' : Lobby.STANDING_STATUS,
+                         'round_timer' : Lobby.ROUND_TIMER_NOT_STARTED})
+        self.roundFrame = 0
+        self.busyFrames = 0                                   # Frames until the player can act again
+        self.enemyBusyFrames = 0
+        self.pendingHit = False                               # Whether the current attack of each side lands when it finishes
+        self.enemyPendingHit = False
+        self.knockOutFrames = 0                               # Frames left of the knock out sequence
+        self.roundOver = False                                # Set on the frame the round is counted, the next round starts on the frame after
+
+    def advanceFrame(self):
+        """Simulates one frame of the fight with the buttons currently held"""
+        ram, held = self.ram, self.heldButtons
+        if self.roundOver: self.startRound()
+        self.frame += 1
+        self.roundFrame += 1
+        if self.knockOutFrames > 0:
+            self.knockOutFrames -= 1
+            if self.knockOutFrames == 0:
+                if ram['enemy_health'] < 0: ram['matches_won'] += 1
+                else: ram['enemy_matches_won'] += 1
+                self.roundOver = True
+            return
+        if self.roundFrame < FakeRetroEnvironment.ROUND_INTRO_FRAMES: return
+        ram['round_timer'] = Lobby.ROUND_TIMER_NOT_STARTED - 1 - (self.roundFrame - FakeRetroEnvironment.ROUND_INTRO_FRAMES) // 60
+
+        # The player
+        if self.busyFrames > 0:
+            self.busyFrames -= 1
+            if self.busyFrames == 0:
+                if self.pendingHit: self.land('enemy_health', 'enemy_status')
+                ram['status'] = Lobby.STANDING_STATUS
+        elif numpy.any(held[self.attackMask]):
+            ram['status'] = FakeRetroEnvironment.ATTACK_STATUS
+            self.busyFrames = FakeRetroEnvironment.ATTACK_FRAMES
+            self.pendingHit = self.random.rand() < FakeRetroEnvironment.HIT_CHANCE
+        elif held[self.buttons.index('UP')]:
+            ram['status'] = Lobby.JUMPING_STATUS
+            self.busyFrames = FakeRetroEnvironment.JUMP_FRAMES
+            self.pendingHit = False
+        elif held[self.buttons.index('DOWN')]:
+            ram['status'] = Lobby.CROUCHING_STATUS
+        else:
+            ram['status'] = Lobby.STANDING_STATUS
+        if ram['status'] != FakeRetroEnvironment.ATTACK_STATUS:
+            move = int(held[self.buttons.index('RIGHT')]) - int(held[self.buttons.index('LEFT')])
+            ram['x_position'] = min(max(ram['x_position'] + move, 0), 400)
+
+        # The enemy
+        if self.enemyBusyFrames > 0:
+            self.enemyBusyFrames -= 1
+            if self.enemyBusyFrames == 0:
+                if self.enemyPendingHit: self.land('health', 'status')
+                ram['enemy_status'] = Lobby.STANDING_STATUS
+        elif self.random.rand() < FakeRetroEnvironment.ENEMY_ATTACK_CHANCE:
+            ram['enemy_status'] = FakeRetroEnvironment.ATTACK_STATUS + 2
+            self.enemyBusyFrames = FakeRetroEnvironment.ATTACK_FRAMES
+            self.enemyPendingHit = self.random.rand() < FakeRetroEnvironment.HIT_CHANCE
+        else:
+            ram['enemy_x_position'] += int(numpy.sign(ram['x_position'] - ram['enemy_x_position']))
+
+        # The end of a round
+        if ram['health'] < 0 or ram['enemy_health'] < 0:
+            ram['status'] = ram['enemy_status'] = FakeRetroEnvironment.KNOCKED_OUT_STATUS
+            self.knockOutFrames = FakeRetroEnvironment.KNOCK_OUT_FRAMES
+
+    def land(self, healthField, statusField):
+        """Lands a finished attack on the fighter with the given health and status fields, stunning them"""
+        damage = self.random.randint(FakeRetroEnvironment.MIN_DAMAGE, FakeRetroEnvironment.MAX_DAMAGE)
+        self.ram[healthField] -= damage
+        self.ram['score'] += damage * 100 if healthField == 'enemy_health' else 0
+        self.ram[statusField] = FakeRetroEnvironment.HIT_STUN_STATUS
+        if statusField == 'status':
+            self.busyFrames = FakeRetroEnvironment.HIT_STUN_FRAMES
+            self.pendingHit = False
+        else:
+            self.enemyBusyFrames = FakeRetroEnvironment.HIT_STUN_FRAMES
+            self.enemyPendingHit = False
+
+    def action_to_array(self, action):
+        """Splits the button array into one array per player, there is a single player"""
+        return [action]
+
+    def updateRewards(self):
+        """Works out the reward and done flag of the frame just simulated, the reward follows reward_script.lua"""
+        ram = self.ram
+        reward = 0
+        if ram['health'] < self.previousHealth: reward += ram['health'] - self.previousHealth
+        if ram['enemy_health'] < self.previousEnemyHealth: reward += self.previousEnemyHealth - ram['enemy_health']
+        if ram['matches_won'] > self.previousWins: reward += 100
+        if ram['enemy_matches_won'] > self.previousEnemyWins: reward -= 100
+        self.previousHealth, self.previousEnemyHealth = ram['health'], ram['enemy_health']
+        self.previousWins, self.previousEnemyWins = ram['matches_won'], ram['enemy_matches_won']
+        self.reward = reward
+        self.isDone = ram['matches_won'] == FakeRetroEnvironment.WINS_NEEDED or ram['enemy_matches_won'] == FakeRetroEnvironment.WINS_NEEDED
+
+    def compute_step(self):
+        """Returns the reward, done flag and RAM info of the current frame"""
+        return self.data.current_reward(), self.data.is_done(), self.data.lookup_all()
+
+    def get_ram(self):
+        """Writes the variables into the RAM and returns a copy of it, standing in for the cost of copying out the emulator's memory"""
+        values = numpy.array([self.ram[field] for field in self.infoFields], dtype= numpy.int64)
+        for index in self.decimalFields:
+            values[index] = int(str(values[index]), 16)                                           # Binary coded decimal, each digit in a nibble
+        self.memory[self.byteOffsets] = (values[self.byteFields] >> self.byteShifts) & 0xFF
+        return self.memory.copy()
+
+    def _update_obs(self):
+        """Returns a copy of the blank screen, or of the RAM in RAM observation mode, standing in for the cost of copying out the emulator's frame"""
+        if self.ramObservations: return self.get_ram()
+        return self.screen.copy()
+
+    def step(self, action):
+        """Advances one frame holding the given buttons, in the same order of calls as retro's RetroEnv.step"""
+        for player, buttons in enumerate(self.action_to_array(action)):
+            self.em.set_button_mask(buttons, player)
+        self.em.step()
+        self.data.update_ram()
+        reward, done, info = self.compute_step()
+        return self._update_obs(), reward, done, info
+
+    def render(self, mode= 'human'):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeLobby(Lobby):
+    """A Lobby that plays in FakeRetroEnvironments instead of the real game"""
+
+    def makeEnvironment(self, state, ramObservations= False):
+        """Creates a fake environment wrapped in the discretized action space"""
+        return StreetFighter2Discretizer(FakeRetroEnvironment(state, ramObservations= ramObservations))
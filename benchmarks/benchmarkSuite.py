@@ -0,0 +1,129 @@
+import argparse, os, sys, time, json, subprocess, numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from FakeRetroEnvironment import FakeLobby
+from Lobby import Lobby
+from Agent import Agent
+from DeepQAgent import DeepQAgent
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'local_logs', 'benchmarkHistory.json')
+
+def benchmarkLobbyPlay(states):
+    """Plays the save states with the random Agent in fake environments and returns the emulated frames and decisions per second"""
+    lobby = FakeLobby()
+    agent = Agent()
+    lobby.addPlayer(agent)
+    decisions = 0
+    start = time.perf_counter()
+    for state in states:
+        lobby.play(state)
+        decisions += len(agent.memory)
+        agent.prepareForNextFight()
+    elapsed = time.perf_counter() - start
+    lobby.closeEnvironment()
+    return {'lobbyFramesPerSecond' : lobby.emulatedFrames / elapsed, 'lobbyDecisionsPerSecond' : decisions / elapsed}
+
+def recordFight(agent, state):
+    """Has the Agent play a save state in a fake environment so its memory holds a full fight"""
+    lobby = FakeLobby()
+    lobby.addPlayer(agent)
+    lobby.play(state)
+    lobby.closeEnvironment()
+
+def collectInfos(state):
+    """Returns the RAM info of every state the random Agent got to act in during a fake fight"""
+    agent = Agent()
+    recordFight(agent, state)
+    return [step[Agent.STATE_INDEX] for step in agent.memory]
+
+def benchmarkGetMove(agent, infos):
+    """Times the DeepQAgent choosing its move greedily for every info and returns the decisions per second"""
+    epsilon, agent.epsilon = agent.epsilon, 0
+    agent.getMove(None, infos[0])                                                                  # Warm up any tracing before timing
+    start = time.perf_counter()
+    for info in infos:
+        agent.getMove(None, info)
+    elapsed = time.perf_counter() - start
+    agent.epsilon = epsilon
+    return {'getMoveDecisionsPerSecond' : len(infos) / elapsed}
+
+def benchmarkTraining(agent):
+    """Times preparing and training on the DeepQAgent's recorded fight and returns the transitions per second of each"""
+    transitions = len(agent.memory)
+    start = time.perf_counter()
+    data = agent.prepareMemoryForTraining(agent.memory)
+    prepareElapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    agent.trainNetwork(data, agent.model)
+    trainElapsed = time.perf_counter() - start
+    return {'prepareMemoryTransitionsPerSecond' : transitions / max(prepareElapsed, 1e-9), 'trainNetworkTransitionsPerSecond' : transitions / trainElapsed}
+
+def getCommit():
+    """Returns the hash of the checked out commit, or None outside of a git checkout"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr= subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def findRegressions(metrics, history, window, tolerance):
+    """Compares each metric against the median of the last runs in the history
+
+    Parameters
+    ----------
+    metrics
+        A dictionary of this run's throughputs, higher is better for all of them
+
+    history
+        The list of previous runs, each a dictionary with a metrics dictionary
+
+    window
+        The number of most recent runs the baseline is taken over
+
+    tolerance
+        The fraction a metric may fall below its baseline before it is flagged
+
+    Returns
+    -------
+    regressions
+        A dictionary mapping each regressed metric to its value and baseline
+    """
+    regressions = {}
+    for name, value in metrics.items():
+        previous = [run['metrics'][name] for run in history[-window:] if name in run['metrics']]
+        if not previous: continue
+        baseline = float(numpy.median(previous))
+        if value < (1 - tolerance) * baseline: regressions[name] = {'value' : value, 'baseline' : baseline}
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks the Lobby, DeepQAgent move selection and training against fake environments and tracks regressions.')
+    parser.add_argument('-s', '--states', type= int, default= None, help= 'Integer number of save states to play, defaults to the whole roster')
+    parser.add_argument('-p', '--path', type= str, default= DEFAULT_HISTORY_PATH, help= 'JSON file the results of every run are kept in')
+    parser.add_argument('-w', '--window', type= int, default= 5, help= 'Integer number of previous runs the regression baseline is the median of')
+    parser.add_argument('-t', '--tolerance', type= float, default= 0.1, help= 'Fraction a throughput may fall below its baseline before it counts as a regression')
+    parser.add_argument('-n', '--no_save', action= 'store_true', help= 'Boolean flag for not adding this run to the history')
+    args = parser.parse_args()
+
+    numpy.random.seed(0)
+    states = sorted(Lobby.getStates())[:args.states]
+    metrics = benchmarkLobbyPlay(states)
+    agent = DeepQAgent(name= 'benchmark')
+    metrics.update(benchmarkGetMove(agent, collectInfos(states[0])))
+    recordFight(agent, states[0])
+    metrics.update(benchmarkTraining(agent))
+
+    history = []
+    if os.path.exists(args.path):
+        with open(args.path, 'r') as file:
+            history = json.load(file)
+    regressions = findRegressions(metrics, history, args.window, args.tolerance)
+    for name, value in metrics.items():
+        flag = '  REGRESSION from {0:.1f}'.format(regressions[name]['baseline']) if name in regressions else ''
+        print('{0:>36}: {1:12.1f}{2}'.format(name, value, flag))
+
+    if not args.no_save:
+        history.append({'time' : time.strftime('%Y-%m-%d %H:%M:%S'), 'commit' : getCommit(), 'metrics' : metrics})
+        os.makedirs(os.path.dirname(args.path), exist_ok= True)
+        with open(args.path, 'w') as file:
+            json.dump(history, file, indent= 4)
+    if regressions: sys.exit(1)
@@ -0,0 +1,33 @@
+import argparse, os, sys, time, random
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from FakeRetroEnvironment import FakeRetroEnvironment
+from Discretizer import StreetFighter2Discretizer
+
+ATTACK_BUTTONS = ['X', 'Y', 'Z', 'A', 'B', 'C']
+
+def timeFrames(function, actions):
+    """Returns the number of frames per second the per frame function handles"""
+    start = time.perf_counter()
+    for action in actions:
+        function(action)
+    return len(actions) / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks the per frame overhead of decoding discrete actions and checking them for attack buttons.')
+    parser.add_argument('-f', '--frames', type= int, default= 1000000, help= 'Integer number of frames to time each approach over')
+    args = parser.parse_args()
+
+    discretizer = StreetFighter2Discretizer(FakeRetroEnvironment())
+    actionCount = discretizer.action_space.n
+    actions = [random.randrange(actionCount) for _ in range(1000)] * (args.frames // 1000)
+
+    # The original list of button arrays that was copied every frame, and the scan of the action's button names
+    decodeList = [row.copy() for row in discretizer._decode_discrete_action]
+    copyAction = lambda action: decodeList[action].copy()
+    scanAttackButtons = lambda action: any([button in discretizer.get_action_meaning(action) for button in ATTACK_BUTTONS])
+
+    print('{0:>28}: {1:12.1f} frames/sec'.format('action copied from list', timeFrames(copyAction, actions)))
+    print('{0:>28}: {1:12.1f} frames/sec'.format('action row of decode table', timeFrames(discretizer.action, actions)))
+    print('{0:>28}: {1:12.1f} frames/sec'.format('attack buttons scanned', timeFrames(scanAttackButtons, actions)))
+    print('{0:>28}: {1:12.1f} frames/sec'.format('has_attack_button flag', timeFrames(discretizer.has_attack_button.__getitem__, actions)))
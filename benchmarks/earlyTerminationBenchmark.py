@@ -0,0 +1,43 @@
+import argparse, os, sys, time, random
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from Lobby import Lobby
+from Agent import Agent
+
+def benchmarkPlay(lobby, states, seed):
+    """Returns the emulated frames, the seconds taken and the reward of each fight of the seeded random Agent playing the save states"""
+    random.seed(seed)
+    agent = Agent()
+    lobby.addPlayer(agent)
+    lobby.resetFrameCounts()
+    fightRewards, elapsed = [], 0.0
+    for state in states:
+        start = time.perf_counter()
+        lobby.play(state)
+        elapsed += time.perf_counter() - start
+        fightRewards.append(sum(step[3] for step in agent.memory))
+        agent.prepareForNextFight()
+    lobby.closeEnvironment()
+    return lobby.emulatedFrames, elapsed, fightRewards
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks the emulator frames saved by ending fights on the frame their outcome is decided.')
+    parser.add_argument('-s', '--states', type= int, default= 3, help= 'Integer number of save states the random Agent plays in each mode')
+    parser.add_argument('--seed', type= int, default= 0, help= 'Integer seed of the random Agent\'s moves, the same in each mode')
+    parser.add_argument('-f', '--fake', action= 'store_true', help= 'Boolean flag for using the FakeRetroEnvironment instead of the game ROM')
+    args = parser.parse_args()
+
+    if args.fake:
+        from FakeRetroEnvironment import FakeLobby as lobbyClass
+    else:
+        lobbyClass = Lobby
+    states = sorted(Lobby.getStates())[:args.states]
+    frames, elapsed, rewards = benchmarkPlay(lobbyClass(), states, args.seed)
+    print('{0:>24}: {1:8} frames in {2:6.2f}s'.format('retro\'s done condition', frames, elapsed))
+    frames, elapsed, earlyRewards = benchmarkPlay(lobbyClass(earlyTermination= True), states, args.seed)
+    print('{0:>24}: {1:8} frames in {2:6.2f}s'.format('early termination', frames, elapsed))
+    # Running the ended fights on to retro's end counts the frames saved, the moves up to each decisive knock out are the same
+    measuringLobby = lobbyClass(earlyTermination= True, measureEarlyTermination= True)
+    benchmarkPlay(measuringLobby, states, args.seed)
+    measuringLobby.reportEarlyTermination()
+    print('Fight rewards {0} with retro\'s done condition and {1} with early termination'.format(rewards, earlyRewards))
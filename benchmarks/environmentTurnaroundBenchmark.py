@@ -0,0 +1,31 @@
+import argparse, os, sys, time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from Lobby import Lobby
+
+def timeFightSetup(lobby, states, rounds):
+    """Returns the per fight setup latencies of initializing the lobby's environment for each state"""
+    latencies = []
+    for _ in range(rounds):
+        for state in states:
+            start = time.perf_counter()
+            lobby.initEnvironment(state)
+            latencies.append(time.perf_counter() - start)
+            if not lobby.reuseEnvironment: lobby.closeEnvironment()
+    lobby.closeEnvironment()
+    return latencies
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks the per fight setup latency of the Lobby environment.')
+    parser.add_argument('-r', '--rounds', type= int, default= 3, help= 'Integer number of times to set up every save state')
+    args = parser.parse_args()
+
+    states = Lobby.getStates()
+    startupStart = time.perf_counter()
+    Lobby().initEnvironment(states[0])
+    print('startup: {0:8.2f} ms to build the emulator and reach the first actionable state'.format((time.perf_counter() - startupStart) * 1000))
+
+    for reuse in [False, True]:
+        latencies = sorted(timeFightSetup(Lobby(reuseEnvironment= reuse), states, args.rounds))
+        label = 'reused emulator' if reuse else 'new emulator per fight'
+        print('{0:>22}: {1:8.2f} ms mean, {2:8.2f} ms median per fight'.format(label, sum(latencies) / len(latencies) * 1000, latencies[len(latencies) // 2] * 1000))
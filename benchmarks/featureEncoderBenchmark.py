@@ -0,0 +1,59 @@
+import argparse, os, sys, time, random, numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from FeatureEncoder import FeatureEncoder
+
+# The one hot encoding DeepQAgent.prepareNetworkInputs used to build with lists, kept here as the baseline
+stateIndices = {512 : 0, 514 : 1, 516 : 2, 518 : 3, 520 : 4, 522 : 5, 524 : 6, 526 : 7, 532 : 8}
+doneKeys = [0, 528, 530, 1024, 1026, 1028, 1030, 1032]
+
+def encodeWithLists(step):
+    """The original list based feature vector construction"""
+    feature_vector = []
+    feature_vector.append(step["enemy_health"])
+    feature_vector.append(step["enemy_x_position"])
+    feature_vector.append(step["enemy_y_position"])
+    oneHotEnemyState = [0] * len(stateIndices.keys())
+    if step['enemy_status'] not in doneKeys: oneHotEnemyState[stateIndices[step["enemy_status"]]] = 1
+    feature_vector += oneHotEnemyState
+    oneHotEnemyChar = [0] * 8
+    oneHotEnemyChar[step["enemy_character"]] = 1
+    feature_vector += oneHotEnemyChar
+    feature_vector.append(step["health"])
+    feature_vector.append(step["x_position"])
+    feature_vector.append(step["y_position"])
+    oneHotPlayerState = [0] * len(stateIndices.keys())
+    if step['status'] not in doneKeys: oneHotPlayerState[stateIndices[step["status"]]] = 1
+    feature_vector += oneHotPlayerState
+    return numpy.reshape(feature_vector, [1, 32])
+
+def makeInfo():
+    """Returns a RAM info dictionary with every field the encoder reads"""
+    statuses = list(stateIndices.keys()) + doneKeys
+    return {'enemy_health' : random.randint(-1, 176), 'enemy_x_position' : random.randint(0, 400), 'enemy_y_position' : random.randint(0, 200),
+            'enemy_status' : random.choice(statuses), 'enemy_character' : random.randrange(8), 'health' : random.randint(-1, 176),
+            'x_position' : random.randint(0, 400), 'y_position' : random.randint(0, 200), 'status' : random.choice(statuses)}
+
+def timeRate(function, records):
+    """Returns the records encoded per second by the function"""
+    start = time.perf_counter()
+    function()
+    return records / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks the FeatureEncoder against the old list based feature vectors.')
+    parser.add_argument('-r', '--records', type= int, default= 100000, help= 'Integer number of info records to encode')
+    args = parser.parse_args()
+
+    infos = [makeInfo() for _ in range(args.records)]
+    encoder = FeatureEncoder()
+    row = numpy.zeros(FeatureEncoder.FEATURE_COUNT, dtype= numpy.float32)
+
+    expected = numpy.vstack([encodeWithLists(info) for info in infos[:1000]])
+    assert numpy.array_equal(expected, encoder.encodeBatch(infos[:1000])), 'The encoder does not match the original feature vectors'
+
+    print('{0:>24}: {1:12.1f} records/sec'.format('lists', timeRate(lambda: [encodeWithLists(info) for info in infos], args.records)))
+    print('{0:>24}: {1:12.1f} records/sec'.format('encode into a row', timeRate(lambda: [encoder.encode(info, out= row) for info in infos], args.records)))
+    print('{0:>24}: {1:12.1f} records/sec'.format('encodeBatch of dicts', timeRate(lambda: encoder.encodeBatch(infos), args.records)))
+    columns = {field : numpy.array([info[field] for info in infos]) for field in infos[0]}
+    print('{0:>24}: {1:12.1f} records/sec'.format('encodeBatch of columns', timeRate(lambda: encoder.encodeBatch(columns), args.records)))
@@ -0,0 +1,30 @@
+import argparse, os, sys, time, numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from DeepQAgent import DeepQAgent
+
+def timeDecisions(agent, rows):
+    """Runs the agent's inference path on every row and returns the latency of each call in seconds"""
+    latencies = numpy.zeros(len(rows))
+    for index, row in enumerate(rows):
+        start = time.perf_counter()
+        agent.predictRewards(row)
+        latencies[index] = time.perf_counter() - start
+    return latencies
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks the single decision inference paths of the DeepQAgent.')
+    parser.add_argument('-d', '--decisions', type= int, default= 2000, help= 'Integer number of decisions to time for each inference mode')
+    args = parser.parse_args()
+
+    rows = numpy.random.rand(args.decisions, 1, 32).astype(numpy.float32)
+    agent = DeepQAgent(inferenceMode= DeepQAgent.PREDICT_INFERENCE)
+    expected = agent.model.predict(rows[0])[0]
+    for mode in DeepQAgent.INFERENCE_MODES:
+        agent.inferenceMode = mode
+        agent.initializeInference()
+        assert numpy.allclose(expected, agent.predictRewards(rows[0]), atol= 1e-4), 'The {0} inference path disagrees with keras'.format(mode)
+        agent.predictRewards(rows[0])                                                         # Warm up any tracing before timing
+        latencies = timeDecisions(agent, rows)
+        print('{0:>9}: {1:10.1f} decisions/sec, p50 {2:8.3f} ms, p99 {3:8.3f} ms'.format(mode, len(rows) / latencies.sum(), numpy.percentile(latencies, 50) * 1000,
+                                                                                        numpy.percentile(latencies, 99) * 1000))
@@ -0,0 +1,30 @@
+import argparse, os, sys, time, random
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from Agent import Agent
+from DefaultMoveList import Moves, MovesDict
+
+def getRandomMoveFromEnum(info):
+    """The original random move selection that rebuilt the move list and checked the direction on every decision"""
+    moveName = random.choice(list(Moves))
+    frameInputs = MovesDict[moveName]
+    if moveName == Moves.Fireball or moveName == Moves.HurricaneKick or moveName == Moves.DragonUppercut:
+        frameInputs = frameInputs[0] if info['x_position'] < info['enemy_x_position'] else frameInputs[1]
+    return moveName.value, frameInputs
+
+def timeDecisions(function, infos):
+    """Returns the number of decisions per second the move selection function makes"""
+    start = time.perf_counter()
+    for info in infos:
+        function(info)
+    return len(infos) / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks random move selection and frame input lookup.')
+    parser.add_argument('-d', '--decisions', type= int, default= 1000000, help= 'Integer number of decisions to make')
+    args = parser.parse_args()
+
+    infos = [{'x_position' : random.randint(0, 400), 'enemy_x_position' : random.randint(0, 400)} for _ in range(1000)] * (args.decisions // 1000)
+    agent = Agent()
+    print('{0:>20}: {1:12.1f} decisions/sec'.format('enum list per move', timeDecisions(getRandomMoveFromEnum, infos)))
+    print('{0:>20}: {1:12.1f} decisions/sec'.format('indexed move table', timeDecisions(agent.getRandomMove, infos)))
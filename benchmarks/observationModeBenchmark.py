@@ -0,0 +1,47 @@
+import argparse, os, sys, time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from Lobby import Lobby
+from Agent import Agent
+
+def benchmarkSteps(lobby, state, frames):
+    """Returns the frames per second of stepping the lobby's environment directly with no inputs"""
+    lobby.initEnvironment(state)
+    environment = lobby.environment
+    start = time.perf_counter()
+    for _ in range(frames):
+        _, _, done, _ = environment.step(Lobby.NO_ACTION)
+        if done: environment.reset()
+    return frames / (time.perf_counter() - start)
+
+def benchmarkPlay(lobby, states):
+    """Returns the emulated frames per second of the random Agent playing the save states in the lobby"""
+    agent = Agent()
+    lobby.addPlayer(agent)
+    lobby.resetFrameCounts()
+    start = time.perf_counter()
+    for state in states:
+        lobby.play(state)
+        agent.prepareForNextFight()
+    return lobby.emulatedFrames / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks emulator frames per second with screen observations against RAM observations.')
+    parser.add_argument('-s', '--states', type= int, default= 3, help= 'Integer number of save states the random Agent plays in each mode')
+    parser.add_argument('-n', '--frames', type= int, default= 20000, help= 'Integer number of frames stepped directly in each mode')
+    parser.add_argument('-f', '--fake', action= 'store_true', help= 'Boolean flag for using the FakeRetroEnvironment instead of the game ROM')
+    args = parser.parse_args()
+
+    if args.fake:
+        from FakeRetroEnvironment import FakeLobby as lobbyClass
+    else:
+        lobbyClass = Lobby
+    states = sorted(Lobby.getStates())[:args.states]
+    for ramObservations in [False, True]:
+        for fastForward in [False, True]:
+            lobby = lobbyClass(fastForward= fastForward, ramObservations= ramObservations)
+            stepRate = benchmarkSteps(lobby, states[0], args.frames)
+            playRate = benchmarkPlay(lobby, states)
+            lobby.closeEnvironment()
+            label = '{0} observations{1}'.format('RAM' if ramObservations else 'screen', ', fast forward' if fastForward else '')
+            print('{0:>34}: {1:10.1f} frames/s stepping, {2:10.1f} frames/s in Lobby.play'.format(label, stepRate, playRate))
@@ -0,0 +1,33 @@
+import argparse, os, sys, time, numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from ReplayMemory import ReplayMemory
+from PrioritizedReplayMemory import PrioritizedReplayMemory
+
+def fillMemory(memory, transitions, stateSize):
+    """Records a run of random transitions into the memory"""
+    states = numpy.random.rand(transitions + 1, stateSize).astype(numpy.float32)
+    dones = numpy.zeros(transitions, dtype= numpy.bool_)
+    memory.extend((states[:-1], numpy.random.randint(0, 28, size= transitions), numpy.random.rand(transitions).astype(numpy.float32), dones, states[1:]))
+
+def timeSampling(memory, batchSize, minibatches):
+    """Returns the minibatches per second drawn from the memory, including gathering the batch and updating its priorities"""
+    start = time.perf_counter()
+    for indices, weights in memory.iterateMinibatches(batchSize, minibatches):
+        memory.getBatch(indices)
+        memory.updatePriorities(indices, numpy.random.rand(len(indices)))
+    return minibatches / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks minibatch sampling from uniform and prioritized replay memories.')
+    parser.add_argument('-s', '--sizes', type= int, nargs= '+', default= [50000, 1000000], help= 'The numbers of transitions to fill the memories with')
+    parser.add_argument('-b', '--batch_size', type= int, default= 32, help= 'The minibatch size to sample')
+    parser.add_argument('-m', '--minibatches', type= int, default= 2000, help= 'Integer number of minibatches to sample')
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        for memoryClass in [ReplayMemory, PrioritizedReplayMemory]:
+            memory = memoryClass(capacity= size + 1, stateSize= 32)
+            fillMemory(memory, size, 32)
+            rate = timeSampling(memory, args.batch_size, args.minibatches)
+            print('{0:>24} with {1:>8} transitions: {2:10.1f} minibatches/sec, {3:12.1f} transitions/sec'.format(memoryClass.__name__, size, rate, rate * args.batch_size))
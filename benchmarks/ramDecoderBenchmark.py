@@ -0,0 +1,69 @@
+import argparse, os, sys, time, numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from Lobby import Lobby
+from FightRecorder import FightRecorder
+
+def benchmarkStepping(environment, decoder, frames):
+    """Returns the frames per second of fast forwarding with retro's lookup of every variable and with the RamDecoder"""
+    start = time.perf_counter()
+    for _ in range(frames):
+        environment.step_without_observation(Lobby.NO_ACTION)
+    lookupRate = frames / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for _ in range(frames):
+        _, _, ram = environment.step_ram(Lobby.NO_ACTION)
+        decoder.decode(ram)
+    return lookupRate, frames / (time.perf_counter() - start)
+
+def benchmarkRecording(infos, records):
+    """Returns the decisions per second of writing info dictionaries and decoded records into a FightRecorder"""
+    rates = []
+    for states in [infos, records]:
+        recorder = FightRecorder(Lobby.getInfoFields(), capacity= len(states))
+        start = time.perf_counter()
+        recorder.start(states[0])
+        for state in states[1:]:
+            recorder.record(0, 0, state, False)
+        rates.append(len(states) / (time.perf_counter() - start))
+    return rates
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks decoding the RAM info with the RamDecoder against retro looking up every variable.')
+    parser.add_argument('-n', '--frames', type= int, default= 20000, help= 'Integer number of frames to step with each approach')
+    parser.add_argument('-f', '--fake', action= 'store_true', help= 'Boolean flag for using the FakeRetroEnvironment instead of the game ROM')
+    args = parser.parse_args()
+
+    if args.fake:
+        from FakeRetroEnvironment import FakeLobby as lobbyClass
+    else:
+        lobbyClass = Lobby
+    lobby = lobbyClass(ramObservations= True, decodeRam= True)
+    lobby.initEnvironment(sorted(Lobby.getStates())[0])
+    decoder = lobby.ramDecoder
+    if decoder is None:
+        print('The decoded RAM did not match retro\'s lookup in either byte order')
+        sys.exit(1)
+    print('Decoding the RAM with {0} 16 bit words'.format('byte swapped' if decoder.swapped else 'big endian'))
+
+    lookupRate, decodeRate = benchmarkStepping(lobby.environment, decoder, args.frames)
+    print('{0:>28}: {1:10.1f} frames/s'.format('retro lookup_all', lookupRate))
+    print('{0:>28}: {1:10.1f} frames/s'.format('RamDecoder.decode', decodeRate))
+
+    rams, infos = [], []
+    for _ in range(args.frames):
+        _, done, ram = lobby.environment.step_ram(Lobby.NO_ACTION)
+        rams.append(ram)
+        infos.append(lobby.environment.unwrapped.data.lookup_all())
+        if done: lobby.environment.reset()
+    rams = numpy.stack(rams)
+    start = time.perf_counter()
+    records = decoder.decodeRecords(rams)
+    print('{0:>28}: {1:10.1f} frames/s'.format('RamDecoder.decodeRecords', len(rams) / (time.perf_counter() - start)))
+    mismatches = sum(not decoder.matches(ram, info) for ram, info in zip(rams, infos))
+    print('{0:>28}: {1} of {2} frames'.format('mismatches with lookup_all', mismatches, len(rams)))
+
+    dictionaryRate, recordRate = benchmarkRecording(infos, list(records))
+    print('{0:>28}: {1:10.1f} decisions/s'.format('recording dictionaries', dictionaryRate))
+    print('{0:>28}: {1:10.1f} decisions/s'.format('recording records', recordRate))
+    lobby.closeEnvironment()
@@ -0,0 +1,61 @@
+import argparse, os, sys, time, random, numpy
+from collections import deque
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from ReplayMemory import ReplayMemory
+
+INFO_FIELDS = ['continue_timer', 'round_timer', 'enemy_health', 'enemy_x_position', 'enemy_y_position', 'enemy_matches_won', 'enemy_status',
+               'enemy_character', 'health', 'x_position', 'y_position', 'status', 'matches_won', 'score']
+OBSERVATION_SHAPE = (200, 256, 3)                             # The cropped frame retro returns for the game
+
+def makeInfo():
+    """Returns a RAM info dictionary shaped like the ones retro returns"""
+    return {field : random.randint(0, 512) for field in INFO_FIELDS}
+
+def sizeOfStep(step):
+    """Approximates the bytes held by one deque step tuple, counting the info dictionaries and observations it references"""
+    total = sys.getsizeof(step)
+    for element in step:
+        if isinstance(element, numpy.ndarray): total += element.nbytes
+        elif isinstance(element, dict): total += sys.getsizeof(element) + sum(sys.getsizeof(value) for value in element.values())
+        else: total += sys.getsizeof(element)
+    return total
+
+def benchmarkDeque(steps, observations):
+    """Records steps the way Agent.memory used to and returns the record rate and bytes held"""
+    memory = deque(maxlen= steps)
+    infos = [makeInfo() for _ in range(steps + 1)]
+    frames = [numpy.zeros(OBSERVATION_SHAPE, dtype= numpy.uint8) for _ in range(2)] if observations else [None, None]
+    start = time.perf_counter()
+    for index in range(steps):
+        memory.append((frames[0], infos[index], random.randrange(28), 1, frames[1], infos[index + 1], False))
+    rate = steps / (time.perf_counter() - start)
+    # The Lobby hands every step its own frames, so they are counted per step even though two are reused here
+    return rate, sum(sizeOfStep(step) for step in memory)
+
+def benchmarkReplayMemory(steps, stateSize, observations, batchSize):
+    """Records steps into a ReplayMemory and returns the record rate, sample rate and bytes allocated"""
+    memory = ReplayMemory(capacity= steps, stateSize= stateSize, observationShape= OBSERVATION_SHAPE if observations else None)
+    states = numpy.random.rand(steps + 1, stateSize).astype(numpy.float32)
+    start = time.perf_counter()
+    for index in range(steps):
+        memory.append(states[index], random.randrange(28), 1, states[index + 1], False)
+    recordRate = steps / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        memory.getBatch(memory.sample(batchSize))
+    sampleRate = 1000 / (time.perf_counter() - start)
+    return recordRate, sampleRate, memory.nbytes()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks the replay memory against the old deque of step tuples.')
+    parser.add_argument('-s', '--steps', type= int, default= 50000, help= 'Integer number of steps to record, the footprint is reported for this many steps')
+    parser.add_argument('-o', '--observations', action= 'store_true', help= 'Boolean flag for storing full resolution observations with every step')
+    parser.add_argument('-b', '--batch_size', type= int, default= 32, help= 'The minibatch size to benchmark sampling with')
+    args = parser.parse_args()
+
+    rate, footprint = benchmarkDeque(args.steps, args.observations)
+    print('deque of tuples: {0:12.1f} steps/sec recorded, {1:10.1f} MB per {2} steps'.format(rate, footprint / 2**20, args.steps))
+    recordRate, sampleRate, footprint = benchmarkReplayMemory(args.steps, 32, args.observations, args.batch_size)
+    print('replay memory:   {0:12.1f} steps/sec recorded, {1:10.1f} MB per {2} steps, {3:.1f} minibatches/sec sampled'.format(recordRate, footprint / 2**20, args.steps, sampleRate))
@@ -0,0 +1,19 @@
+import argparse, os, sys, time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from Agent import Agent
+from Lobby import Lobby
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks episode throughput of Lobby.executeTrainingRun with rollout worker processes.')
+    parser.add_argument('-w', '--workers', type= int, nargs= '+', default= [1, 2, 4, 8], help= 'The numbers of rollout workers to benchmark')
+    parser.add_argument('-e', '--episodes', type= int, default= 1, help= 'Integer number of episodes to play for each worker count')
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        lobby = Lobby()
+        lobby.addPlayer(Agent())
+        start = time.perf_counter()
+        lobby.executeTrainingRun(review= False, episodes= args.episodes, workers= workers)
+        elapsed = time.perf_counter() - start
+        print('{0:>2} workers: {1:8.2f} sec per episode, {2:6.3f} episodes/sec'.format(workers, elapsed / args.episodes, args.episodes / elapsed))
@@ -0,0 +1,31 @@
+import argparse, os, sys, time, subprocess
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# The framework imports Agent.py used to make at module level, prepended to a scenario to time it the way it used to start
+EAGER_IMPORTS = 'from tensorflow.python import keras; from keras.models import load_model; '
+
+# Each scenario is a line of python run in a fresh interpreter inside src
+SCENARIOS = [('import Lobby', 'import Lobby'),
+             ('construct Lobby and Agent', 'from Lobby import Lobby; from Agent import Agent; lobby = Lobby(); lobby.addPlayer(Agent())'),
+             ('import DeepQAgent', 'import DeepQAgent'),
+             ('construct DeepQAgent', 'from DeepQAgent import DeepQAgent; DeepQAgent()')]
+
+def timeScenario(code, runs):
+    """Returns the median wall time in seconds of running the code in a new python process"""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd= SRC_PATH, check= True, stdout= subprocess.DEVNULL, stderr= subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return sorted(times)[len(times) // 2]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks the startup time of the platform with and without importing tensorflow up front.')
+    parser.add_argument('-r', '--runs', type= int, default= 5, help= 'Integer number of fresh interpreters to time each scenario in')
+    args = parser.parse_args()
+
+    for label, code in SCENARIOS:
+        eager = timeScenario(EAGER_IMPORTS + code, args.runs)
+        lazy = timeScenario(code, args.runs)
+        print('{0:>26}: {1:8.2f} s with tensorflow imported up front, {2:8.2f} s lazily'.format(label, eager, lazy))
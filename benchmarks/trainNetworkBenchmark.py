@@ -0,0 +1,53 @@
+import argparse, os, sys, time, numpy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from DeepQAgent import DeepQAgent
+from ReplayMemory import ReplayMemory
+
+def makeSyntheticData(agent, transitions):
+    """Builds a replay memory holding a random fight"""
+    states = numpy.random.rand(transitions, agent.stateSize).astype(numpy.float32)
+    actions = numpy.random.randint(0, agent.actionSize, size= transitions)
+    rewards = numpy.random.randint(-20, 20, size= transitions).astype(numpy.float32)
+    dones = numpy.zeros(transitions, dtype= numpy.bool_)
+    dones[-1] = True
+    nextStates = numpy.roll(states, -1, axis= 0)
+    memory = ReplayMemory(capacity= 2 * transitions, stateSize= agent.stateSize)
+    memory.extend((states, actions, rewards, dones, nextStates))
+    return memory
+
+def trainOneTransitionAtATime(agent, data, model):
+    """The original training loop, three keras dispatches per transition, kept here as the baseline"""
+    states, actions, rewards, dones, nextStates = data.getTransitions()
+    for index in numpy.random.permutation(len(actions)):
+        state, nextState = states[index : index + 1], nextStates[index : index + 1]
+        modelOutput = model.predict(state)[0]
+        reward = rewards[index]
+        if not dones[index]:
+            reward = (reward + agent.gamma * numpy.amax(model.predict(nextState)[0]))
+        modelOutput[actions[index]] = reward
+        modelOutput = numpy.reshape(modelOutput, [1, agent.actionSize])
+        model.fit(state, modelOutput, epochs= 1, verbose= 0, callbacks= [agent.lossHistory])
+    return model
+
+def timeTraining(trainFunction, transitions):
+    """Returns the number of transitions reviewed per second by the training function"""
+    start = time.perf_counter()
+    trainFunction()
+    return transitions / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Benchmarks DeepQAgent.trainNetwork throughput.')
+    parser.add_argument('-t', '--transitions', type= int, default= 2000, help= 'Integer number of transitions in the synthetic fight memory, a fight is about 2000')
+    parser.add_argument('-b', '--batch_sizes', type= int, nargs= '+', default= [1, 32, 128], help= 'The batch sizes to benchmark the batched training mode with')
+    args = parser.parse_args()
+
+    agent = DeepQAgent()
+    data = makeSyntheticData(agent, args.transitions)
+
+    rate = timeTraining(lambda: trainOneTransitionAtATime(agent, data, agent.model), args.transitions)
+    print('{0:>28}: {1:10.1f} transitions/sec'.format('one transition at a time', rate))
+    for batchSize in args.batch_sizes:
+        agent.batchSize = batchSize
+        rate = timeTraining(lambda: agent.trainNetwork(data, agent.model), args.transitions)
+        print('{0:>28}: {1:10.1f} transitions/sec'.format('batch size {0}'.format(batchSize), rate))
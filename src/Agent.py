@@ -1,9 +1,6 @@
-import argparse, retro, threading, os, numpy, time, random
+import argparse, os, numpy, random
 from collections import deque
 
-from tensorflow.python import keras
-from keras.models import load_model
-
 from DefaultMoveList import Moves
 
 class Agent():
@@ -25,6 +22,12 @@ class Agent():
 
     MAX_DATA_LENGTH = 50000                                                                        # Max number of decision frames the Agent can remember from a fight, average is about 2000 per fight
 
+    # Agents that never look at the pixels leave this off so the Lobby does not keep frames in their memory
+    requiresObservations = False                                                                   # Whether the Agent consumes the observation fields of its recorded steps
+    OBSERVATION_DOWNSAMPLE = 2                                                                     # Keep every nth row and column of a recorded frame
+    OBSERVATION_GRAYSCALE = True                                                                   # Collapse recorded frames down to a single luminance channel
+    GRAYSCALE_WEIGHTS = numpy.array([0.299, 0.587, 0.114], dtype= numpy.float32)                 # Luminance weights of the red, green, and blue channels
+
     DEFAULT_MODELS_DIR_PATH = '../local_models'               # Default path to the dir where the trained models are saved for later access
     DEFAULT_MODELS_SUB_DIR = '{0}_models'                     # Models are further organized into subdirectories to avoid checkpoint overwrites by this naming scheme
     DEFAULT_LOGS_DIR_PATH = '../local_logs'                   # Default path to the dir where training logs are saved for user review
@@ -50,17 +53,48 @@ class Agent():
         """
         if name is None: self.name = self.__class__.__name__
         else: self.name = name
+        self.memory = self.initializeMemory()
         self.prepareForNextFight()
         self.moveList = moveList
+        self.buildMoveTable()
 
         if self.__class__.__name__ != "Agent":
             self.model = self.initializeNetwork()    								            # Only invoked in child subclasses, Agent has no network
             if load: self.loadModel()
 
+    def initializeMemory(self):
+        """Returns the object the Agent records its steps into, a double ended queue of step tuples by default"""
+        return deque(maxlen= Agent.MAX_DATA_LENGTH)
+
+    def getModelDirectory(self):
+        """Returns the path to the directory the Agent's model and other training files are saved in"""
+        return os.path.join(Agent.DEFAULT_MODELS_DIR_PATH, Agent.DEFAULT_MODELS_SUB_DIR.format(self.name))
+
     def prepareForNextFight(self):
         """Clears the memory of the fighter so it can prepare to record the next fight"""
         self.memory = deque(maxlen= Agent.MAX_DATA_LENGTH)                                     # Double ended queue that stores states during the game
 
+    def buildMoveTable(self):
+        """Resolves the move list once into tables indexed by move position so picking a move is an array lookup
+        Parameters
+        ----------
+        None
+        Returns
+        -------
+        None
+        """
+        self.moves = list(self.moveList)                                                       # Move index to the enum of the move
+        self.moveIndices = {move : index for index, move in enumerate(self.moves)}
+        self.directionalMoves = set()
+        self.moveInputs = []                                                                   # Move index to the frame inputs when facing right and when facing left
+        for move in self.moves:
+            frameInputs = self.moveList.getMoveInputs(move)
+            if self.moveList.isDirectionalMove(move):
+                self.directionalMoves.add(move)
+                self.moveInputs.append((frameInputs[0], frameInputs[1]))
+            else:
+                self.moveInputs.append((frameInputs, frameInputs))
+
     def getRandomMove(self, info):
         """Returns a random set of button inputs
         Parameters
@@ -74,9 +108,9 @@ class Agent():
         frameInputs
             A set of frame inputs where each number corresponds to a set of button inputs in the action space.
         """ 
-        moveName = random.choice(list(self.moveList))                                          # Take random sample of all the button press inputs the Agent could make
-        frameInputs = self.convertMoveToFrameInputs(moveName, info)                                                   
-        return moveName.value, frameInputs                                
+        moveIndex = random.randrange(len(self.moves))                                          # Take random sample of all the button press inputs the Agent could make
+        frameInputs = self.convertMoveIndexToFrameInputs(moveIndex, info)
+        return self.moves[moveIndex].value, frameInputs
 
     def convertMoveToFrameInputs(self, move, info):
         """Converts the desired move into a series of frame inputs in order to acomplish that move
@@ -92,9 +126,24 @@ class Agent():
         frameInputs
             An iterable frame inputs object containing the frame by frame input buffer for the move
         """
-        frameInputs = self.moveList.getMoveInputs(move)
-        frameInputs = self.formatInputsForDirection(move, frameInputs, info)
-        return frameInputs
+        return self.convertMoveIndexToFrameInputs(self.moveIndices[move], info)
+
+    def convertMoveIndexToFrameInputs(self, moveIndex, info):
+        """Looks up the frame inputs of the move at the given index of the move table, resolved for the player's direction
+        Parameters
+        ----------
+        moveIndex
+            Integer position of the move in the move list
+        info
+            Metadata dictionary about the current game state from the RAM
+        Returns
+        -------
+        frameInputs
+            An iterable frame inputs object containing the frame by frame input buffer for the move
+        """
+        facingRightInputs, facingLeftInputs = self.moveInputs[moveIndex]
+        if info['x_position'] < info['enemy_x_position']: return facingRightInputs
+        return facingLeftInputs
 
     def formatInputsForDirection(self, move, frameInputs, info):
         """Converts special move directional inputs to account for the player direction so they properly execute
@@ -114,7 +163,7 @@ class Agent():
         frameInputs
             An iterable frame inputs object containing the frame by frame input buffer for the move
         """
-        if not self.moveList.isDirectionalMove(move):
+        if move not in self.directionalMoves:
             return frameInputs
 
         if info['x_position'] < info['enemy_x_position']:
@@ -122,7 +171,21 @@ class Agent():
         else:
             return frameInputs[1]
 
-        return frameInputs
+    def prepareObservation(self, observation):
+        """Shrinks a frame from the emulator into the form the Agent stores in its memory
+        Parameters
+        ----------
+        observation
+            The display image in the form of a 2D array containing RGB values of each pixel
+        Returns
+        -------
+        observation
+            A downsampled and optionally grayscale copy of the frame that does not hold a reference to the original
+        """
+        if observation is None: return None
+        frame = observation[::self.OBSERVATION_DOWNSAMPLE, ::self.OBSERVATION_DOWNSAMPLE]
+        if self.OBSERVATION_GRAYSCALE: frame = numpy.dot(frame, Agent.GRAYSCALE_WEIGHTS).astype(numpy.uint8)
+        return numpy.array(frame, copy= True)
 
     def recordStep(self, step):
         """Records the last observation, action, reward and the resultant observation about the environment for later training
@@ -131,7 +194,7 @@ class Agent():
         step
             A tuple containing the following elements:
             observation
-                The current display image in the form of a 2D array containing RGB values of each pixel
+                The current display image after prepareObservation, or None if the Agent does not require observations
             state
                 The state the Agent was presented with before it took an action.
                 A dictionary containing tagged RAM data
@@ -140,7 +203,7 @@ class Agent():
             reward
                 The reward the agent received for taking that action
             nextObservation
-                The resultant display image in the form of a 2D array containing RGB values of each pixel
+                The resultant display image after prepareObservation, or None if the Agent does not require observations
             nextState
                 The state that the chosen action led to
             done
@@ -151,6 +214,21 @@ class Agent():
         """
         self.memory.append(step) # Steps are stored as tuples to avoid unintended changes
 
+    def recordFight(self, fight):
+        """Records a whole fight handed over by the Lobby once it is over, by default one recordStep per decision
+           Agents that can take the fight's columns directly should override this instead of recordStep
+        Parameters
+        ----------
+        fight
+            A RecordedFight holding the fight's states, actions, rewards, dones and next states as columns
+            Its columns are reused by the Lobby for the next fight, so anything kept has to be copied
+        Returns
+        -------
+        None
+        """
+        for step in fight.steps(observations= self.requiresObservations):
+            self.recordStep(step)
+
     def reviewFight(self):
         """The Agent goes over the data collected from it's last fight, prepares it, and then runs through one epoch of training on the data"""
         data = self.prepareMemoryForTraining(self.memory)
@@ -158,6 +236,51 @@ class Agent():
         self.saveModel()
         self.prepareForNextFight()
 
+    def getRolloutParameters(self):
+        """Returns the keyword arguments needed to construct a copy of this Agent inside a rollout worker process"""
+        return {'name' : self.name, 'moveList' : self.moveList}
+
+    def getLearnerParameters(self):
+        """Returns the keyword arguments needed to construct the copy of this Agent an AsyncLearner trains, which also owns its training memory"""
+        return self.getRolloutParameters()
+
+    def releaseMemory(self):
+        """Called once an AsyncLearner has taken over the training memory, the acting Agent no longer records into its own"""
+        pass
+
+    def getSnapshot(self):
+        """Returns the part of the Agent's learned state a rollout worker needs to act like it, the random Agent has none"""
+        return None
+
+    def loadSnapshot(self, snapshot):
+        """Makes this Agent act like the Agent the snapshot was taken from
+        Parameters
+        ----------
+        snapshot
+            The object returned by getSnapshot on the learning Agent
+        Returns
+        -------
+        None
+        """
+        pass
+
+    def exportMemory(self):
+        """Returns the steps recorded since the last fight was prepared for in a form that can be sent between processes"""
+        return list(self.memory)
+
+    def importMemory(self, batch):
+        """Records a batch of steps returned by exportMemory, usually from a rollout worker
+        Parameters
+        ----------
+        batch
+            The recorded steps as returned by exportMemory
+        Returns
+        -------
+        None
+        """
+        for step in batch:
+            self.recordStep(step)
+
     def saveModel(self):
         """Saves the currently trained model in the default naming convention ../models/{Class_Name}Model
         Parameters
@@ -167,7 +290,7 @@ class Agent():
         -------
         None
         """
-        totalDirPath = os.path.join(Agent.DEFAULT_MODELS_DIR_PATH, Agent.DEFAULT_MODELS_SUB_DIR.format(self.name))
+        totalDirPath = self.getModelDirectory()
         self.model.save_weights(os.path.join(totalDirPath, self.getModelName()))
         with open(os.path.join(Agent.DEFAULT_LOGS_DIR_PATH, self.getLogsName()), 'a+') as file:
             try:
@@ -186,7 +309,7 @@ class Agent():
         None
         """
         print('Model successfully loaded')
-        totalDirPath = os.path.join(Agent.DEFAULT_MODELS_DIR_PATH, Agent.DEFAULT_MODELS_SUB_DIR.format(self.name))
+        totalDirPath = self.getModelDirectory()
         self.model.load_weights(os.path.join(totalDirPath, self.getModelName()))
 
     def getModelName(self):
@@ -219,6 +342,21 @@ class Agent():
         move, frameInputs = self.getRandomMove(info)
         return move, frameInputs
 
+    def getMoves(self, observations, infos):
+        """Returns a move for each of several environments played in lockstep, child classes can pick them all in one batch
+        Parameters
+        ----------
+        observations
+            A list of the current observation of each environment
+        infos
+            A list of the RAM info dictionaries of each environment
+        Returns
+        -------
+        moves
+            A list of (move, frameInputs) tuples in the order of the environments, see getMove
+        """
+        return [self.getMove(obs, info) for obs, info in zip(observations, infos)]
+
     def initializeNetwork(self):
         """To be implemented in child class, should initialize or load in the Agent's neural network
         
@@ -269,9 +407,10 @@ class Agent():
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Processes agent parameters.')
     parser.add_argument('-r', '--render', action= 'store_true', help= 'Boolean flag for if the user wants the game environment to render during play')
+    parser.add_argument('-w', '--workers', type= int, default= None, help= 'Integer number of rollout worker processes that play the save states in parallel')
     args = parser.parse_args()
     from Lobby import Lobby
     testLobby = Lobby(render= args.render)
     agent = Agent()
     testLobby.addPlayer(agent)
-    testLobby.executeTrainingRun()
\ No newline at end of file
+    testLobby.executeTrainingRun(workers= args.workers)
\ No newline at end of file
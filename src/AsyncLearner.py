@@ -0,0 +1,174 @@
+import threading, queue, time
+
+class AsyncLearner(threading.Thread):
+    """A background thread that trains a copy of an Agent while the Lobby keeps playing with the original.
+       The Lobby pushes every recorded fight into a thread safe queue, the learner drains it into its own replay
+       memory and takes gradient steps on sampled minibatches in between, and every few steps it publishes its
+       weights. The acting Agent picks up the latest published weights between decisions, so the emulator and
+       the learner never wait on each other and neither thread touches the other's model.
+       Works with Agents that train in minibatches like DeepQAgent.
+    """
+
+    DEFAULT_PUBLISH_INTERVAL = 100                            # Gradient steps between publishing weights to the acting Agent
+    DEFAULT_QUEUE_SIZE = 16                                   # Fights that can wait in the queue before the Lobby blocks on the learner
+    DEFAULT_WARMUP_STEPS = 1000                               # Transitions the learner collects before it starts taking gradient steps
+    IDLE_TIMEOUT = 0.1                                        # Seconds the learner waits for new fights when it has nothing to train on
+    PUT_TIMEOUT = 1.0                                         # Seconds the Lobby waits on a full queue before checking the learner is still running
+
+    def __init__(self, agent, publishInterval= DEFAULT_PUBLISH_INTERVAL, queueSize= DEFAULT_QUEUE_SIZE, warmupSteps= DEFAULT_WARMUP_STEPS):
+        """Builds the learner's copy of the Agent, starting from the acting Agent's current weights
+
+        Parameters
+        ----------
+        agent
+            The Agent playing in the Lobby, it receives the published weights
+
+        publishInterval
+            The number of gradient steps between publishing the learner's weights
+
+        queueSize
+            The maximum number of fights waiting to be written into the learner's memory
+
+        warmupSteps
+            The number of transitions the learner's memory has to hold before training starts
+
+        Returns
+        -------
+        None
+        """
+        super(AsyncLearner, self).__init__(name= 'AsyncLearner', daemon= True)
+        self.actingAgent = agent
+        self.learnerAgent = agent.__class__(**agent.getLearnerParameters())
+        self.learnerAgent.loadSnapshot(agent.getSnapshot())
+        agent.releaseMemory()                                  # The learner owns the training memory from here on
+        self.publishInterval = publishInterval
+        self.warmupSteps = warmupSteps
+        self.fights = queue.Queue(maxsize= queueSize)
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.publishedSnapshot = None                          # The latest weights the acting Agent has not picked up yet
+        self.publishedUpdates = 0
+        self.appliedUpdates = 0
+        self.error = None                                      # The exception that stopped the learner thread, raised again in the Lobby's thread
+        self.resetUtilization()
+
+    def resetUtilization(self):
+        """Restarts the measurement of how much of the wall time the learner spends working"""
+        self.busyTime = 0.0
+        self.gradientSteps = 0
+        self.utilizationStart = time.perf_counter()
+
+    def getUtilization(self):
+        """Returns the fraction of the wall time since the last reset the learner spent recording steps and training"""
+        elapsed = time.perf_counter() - self.utilizationStart
+        if elapsed <= 0: return 0.0
+        return min(self.busyTime / elapsed, 1.0)
+
+    def pushFight(self, fight):
+        """Hands a finished fight over to the learner, called by the Lobby in place of the Agent's recordFight
+           Waits while the queue is full, and raises the learner's error instead if the learner thread has stopped
+
+        Parameters
+        ----------
+        fight
+            A RecordedFight, it is copied since the Lobby reuses its columns for the next fight
+
+        Returns
+        -------
+        None
+        """
+        fight = fight.copy()
+        while True:
+            self.raiseError()
+            try:
+                self.fights.put(fight, timeout= AsyncLearner.PUT_TIMEOUT)
+                return
+            except queue.Full:
+                self.raiseError()
+                if not self.is_alive(): raise RuntimeError("The AsyncLearner is no longer running to take the fight")
+
+    def applyPublishedWeights(self):
+        """Loads the latest published weights into the acting Agent, called by the Lobby between decisions
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        applied
+            True if new weights were loaded
+        """
+        self.raiseError()
+        if self.publishedSnapshot is None: return False
+        with self.lock:
+            snapshot, self.publishedSnapshot = self.publishedSnapshot, None
+        self.actingAgent.loadSnapshot(snapshot)
+        self.appliedUpdates += 1
+        return True
+
+    def publish(self):
+        """Makes the learner's current weights available to the acting Agent, replacing any not yet picked up"""
+        snapshot = self.learnerAgent.getSnapshot()
+        with self.lock:
+            self.publishedSnapshot = snapshot
+        self.publishedUpdates += 1
+
+    def finishFight(self):
+        """Decays the exploration rate once per fight like a review would and checkpoints the learner's model and persistent memory"""
+        self.learnerAgent.decayExploration()
+        self.learnerAgent.saveModel()
+        self.learnerAgent.memory.flush()
+        self.learnerAgent.lossHistory.losses_clear()
+        self.publish()
+
+    def drainFights(self, block):
+        """Writes every waiting fight into the learner's memory, waiting briefly for one if block is set"""
+        try:
+            fight = self.fights.get(timeout= AsyncLearner.IDLE_TIMEOUT) if block else self.fights.get_nowait()
+            while True:
+                start = time.perf_counter()
+                self.learnerAgent.recordFight(fight)
+                self.finishFight()
+                self.busyTime += time.perf_counter() - start
+                fight = self.fights.get_nowait()
+        except queue.Empty:
+            pass
+
+    def raiseError(self):
+        """Raises the exception that stopped the learner thread in the calling thread, does nothing while the learner is healthy"""
+        if self.error is not None: raise RuntimeError("The AsyncLearner stopped after an error") from self.error
+
+    def run(self):
+        """Runs the learner, keeping any exception it stops on so the Lobby's thread can raise it, see raiseError"""
+        try:
+            self.learn()
+        except Exception as error:
+            self.error = error
+
+    def learn(self):
+        """Alternates between draining the fight queue and taking gradient steps until stopped and the queue is empty"""
+        agent = self.learnerAgent
+        memory = agent.memory
+        while not self.stopping.is_set() or not self.fights.empty():
+            ready = len(memory) >= max(self.warmupSteps, 1)
+            self.drainFights(block= not ready)
+            if not ready or self.stopping.is_set(): continue
+
+            start = time.perf_counter()
+            indices, weights = memory.sampleMinibatch(min(agent.batchSize, len(memory)))
+            agent.trainStep(memory, agent.model, indices, weights)
+            self.busyTime += time.perf_counter() - start
+            self.gradientSteps += 1
+            if self.gradientSteps % self.publishInterval == 0: self.publish()
+
+        agent.saveModel()
+        memory.flush()
+        self.publish()
+
+    def stop(self):
+        """Lets the learner record the fights still in the queue, waits for it to finish, and loads its final weights into the acting Agent"""
+        self.stopping.set()
+        self.join()
+        self.raiseError()
+        self.applyPublishedWeights()
@@ -1,17 +1,26 @@
-import argparse, retro, threading, os, numpy, random, math
+import argparse, os, numpy
 from Agent import Agent
-from LossHistory import LossHistory
+from ReplayMemory import ReplayMemory
+from PrioritizedReplayMemory import PrioritizedReplayMemory
+from FeatureEncoder import FeatureEncoder
+from TransitionDataset import TransitionDataset, TransitionDatasetWriter
 from DefaultMoveList import Moves
 
-import tensorflow as tf
-from tensorflow.python import keras
-from keras.models import Sequential
-from keras.layers import Dense
-from keras.optimizers import Adam
-from keras.models import load_model
-from keras import backend as K
-import keras.losses
-from collections import deque
+# Tensorflow and keras take seconds to import, so they are only brought in by importFramework once a DeepQAgent is constructed
+tf = None
+
+def importFramework():
+    """Imports tensorflow, keras, and the keras callback used to log losses into this module the first time they are needed"""
+    global tf, Sequential, Dense, Adam, K, LossHistory
+    if tf is not None: return
+    import tensorflow as tf
+    from keras.models import Sequential
+    from keras.layers import Dense
+    from keras.optimizers import Adam
+    from keras import backend as K
+    from keras.utils.generic_utils import get_custom_objects
+    from LossHistory import LossHistory
+    get_custom_objects().update({"_huber_loss": DeepQAgent._huber_loss})
 
 class DeepQAgent(Agent):
     """An agent that implements the Deep Q Neural Network Reinforcement Algorithm to learn street fighter 2"""
@@ -20,10 +29,22 @@ class DeepQAgent(Agent):
     DEFAULT_EPSILON_DECAY = 0.999                             # How fast the exploration rate falls as training persists
     DEFAULT_DISCOUNT_RATE = 0.98                              # How much future rewards influence the current decision of the model
     DEFAULT_LEARNING_RATE = 0.0001
-
-    # Mapping between player state values and their one hot encoding index
-    stateIndices = {512 : 0, 514 : 1, 516 : 2, 518 : 3, 520 : 4, 522 : 5, 524 : 6, 526 : 7, 532 : 8} 
-    doneKeys = [0, 528, 530, 1024, 1026, 1028, 1030, 1032]
+    DEFAULT_BATCH_SIZE = 32                                   # Number of transitions fit together in a single gradient step
+    DEFAULT_TRAINING_STEPS = None                             # Gradient steps per review, None means one pass over the fight memory
+
+    DEFAULT_PERSISTENT_MEMORY_CAPACITY = 1000000              # Transitions a replay memory kept across reviews holds before evicting the oldest
+    REPLAY_MEMORY_DIR = 'replay_memory'                       # Sub directory of the model directory a persistent replay memory is mapped into
+    ACTING_MEMORY_CAPACITY = 1024                             # Transitions the acting Agent holds in RAM while an AsyncLearner owns the replay memory
+    DEFAULT_TARGET_UPDATE_INTERVAL = 1000                     # Gradient steps between target network updates when one is used
+    DEFAULT_TARGET_UPDATE_RATE = 1.0                          # Fraction of the online weights blended into the target network each update, 1 is a hard copy
+
+    # Ways the Agent can run its network when picking a move
+    PREDICT_INFERENCE = 'predict'                             # Keras' predict loop, slow to spin up for a single row
+    COMPILED_INFERENCE = 'compiled'                           # A traced tensorflow function calling the model directly
+    NUMPY_INFERENCE = 'numpy'                                 # A numpy forward pass through an exported copy of the dense layer weights
+    INFERENCE_MODES = [PREDICT_INFERENCE, COMPILED_INFERENCE, NUMPY_INFERENCE]
+    DEFAULT_INFERENCE_MODE = NUMPY_INFERENCE
+    NUMPY_ACTIVATIONS = ['relu', 'linear']                    # The activations the numpy forward pass can run, any other layer raises when exported
 
     ACTION_BUTTONS = ['X', 'Y', 'Z', 'A', 'B', 'C']
 
@@ -37,7 +58,9 @@ class DeepQAgent(Agent):
 
         return K.mean(tf.where(cond, squared_loss, quadratic_loss))
 
-    def __init__(self, stateSize= 32, load= False, epsilon= 1, name= None, moveList= Moves):
+    def __init__(self, stateSize= 32, load= False, epsilon= 1, name= None, moveList= Moves, batchSize= DEFAULT_BATCH_SIZE, trainingSteps= DEFAULT_TRAINING_STEPS, inferenceMode= DEFAULT_INFERENCE_MODE,
+                 targetUpdateInterval= None, targetUpdateRate= DEFAULT_TARGET_UPDATE_RATE, doubleDQN= False, prioritizedReplay= False,
+                 persistentMemory= False, memoryCapacity= None):
         """Initializes the agent and the underlying neural network
 
         Parameters
@@ -59,6 +82,42 @@ class DeepQAgent(Agent):
         moveList
             An enum class that contains all of the allowed moves the Agent can perform
 
+        batchSize
+            The number of transitions that are stacked together and fit in a single gradient step during review
+            A batch size of 1 reproduces the old one transition at a time training
+
+        trainingSteps
+            The number of gradient steps to take each time the Agent reviews a fight
+            If None the Agent makes a single pass over its fight memory
+
+        inferenceMode
+            One of INFERENCE_MODES, selects how the network is run for a single decision
+            The numpy and compiled modes avoid the per call overhead of keras' predict
+
+        targetUpdateInterval
+            The number of gradient steps between updates of a frozen target network used to bootstrap the Q-targets
+            If None no target network is used and the targets come from the model being trained
+
+        targetUpdateRate
+            How much of the trained weights are blended into the target network at each update
+            1 copies the weights over, smaller values give a Polyak average
+
+        doubleDQN
+            A boolean flag that picks the best next move with the trained model but values it with the target network
+            Turns on a target network with the default update interval if none was given
+
+        prioritizedReplay
+            A boolean flag that samples minibatches in proportion to their last temporal difference error
+            instead of making uniform passes over the memory, see PrioritizedReplayMemory
+
+        persistentMemory
+            A boolean flag that keeps the replay memory across reviews instead of clearing it after each one
+            The memory is memory mapped into the model directory under local_models so it also survives restarts
+
+        memoryCapacity
+            The number of transitions the replay memory holds before evicting the oldest
+            Defaults to MAX_DATA_LENGTH, or DEFAULT_PERSISTENT_MEMORY_CAPACITY for a persistent memory
+
         Returns
         -------
         None
@@ -70,8 +129,228 @@ class DeepQAgent(Agent):
         else: self.epsilon = epsilon                          # If the model is not trained set a high initial exploration rate
         self.epsilonDecay = DeepQAgent.DEFAULT_EPSILON_DECAY  # How fast the exploration rate falls as training persists
         self.learningRate = DeepQAgent.DEFAULT_LEARNING_RATE 
-        self.lossHistory = LossHistory()
+        self.batchSize = batchSize
+        self.trainingSteps = trainingSteps
+        self.prioritizedReplay = prioritizedReplay
+        self.persistentMemory = persistentMemory
+        if memoryCapacity is None: memoryCapacity = DeepQAgent.DEFAULT_PERSISTENT_MEMORY_CAPACITY if persistentMemory else Agent.MAX_DATA_LENGTH
+        self.memoryCapacity = memoryCapacity
+        self.featureEncoder = FeatureEncoder()
+        self.stateRow = numpy.zeros((1, stateSize), dtype= numpy.float32)                       # Preallocated rows the features of each decision are written into
+        self.nextStateRow = numpy.zeros((1, stateSize), dtype= numpy.float32)
+        if inferenceMode not in DeepQAgent.INFERENCE_MODES: raise ValueError("Unknown inference mode {0}, expected one of {1}".format(inferenceMode, DeepQAgent.INFERENCE_MODES))
+        self.inferenceMode = inferenceMode
+        self.doubleDQN = doubleDQN
+        if doubleDQN and targetUpdateInterval is None: targetUpdateInterval = DeepQAgent.DEFAULT_TARGET_UPDATE_INTERVAL
+        self.targetUpdateInterval = targetUpdateInterval
+        self.targetUpdateRate = targetUpdateRate
+        self.gradientSteps = 0                                # Gradient steps taken so far, used to schedule target network updates
+        self.targetModel = None
+        importFramework()                                     # Before initializeNetwork, so subclasses overriding it can use the keras names
         super(DeepQAgent, self).__init__(load= load, name= name, moveList= moveList) 
+        print('Successfully initialized model')                # Printed here as initializeNetwork also builds the target network
+        self.lossHistory = LossHistory()
+        self.initializeInference()
+        if self.targetUpdateInterval is not None:
+            self.targetModel = self.initializeNetwork()
+            self.targetModel.set_weights(self.model.get_weights())
+
+    def initializeInference(self):
+        """Builds the functions getMove and getMoves use to run the network on a single state and on a batch of states, see INFERENCE_MODES"""
+        if self.inferenceMode == DeepQAgent.COMPILED_INFERENCE:
+            model = self.model
+            compiledCall = tf.function(lambda stateData: model(stateData, training= False))
+            self.predictRewards = lambda stateData: compiledCall(stateData).numpy()[0]
+            self.predictRewardsBatch = lambda stateData: compiledCall(stateData).numpy()
+        elif self.inferenceMode == DeepQAgent.NUMPY_INFERENCE:
+            self.exportInferenceWeights()
+            self.predictRewards = self.predictRewardsWithNumpy
+            self.predictRewardsBatch = self.predictRewardsBatchWithNumpy
+        else:
+            self.predictRewards = lambda stateData: self.model.predict(stateData)[0]
+            self.predictRewardsBatch = lambda stateData: numpy.asarray(self.model.predict_on_batch(stateData))
+
+    def exportInferenceWeights(self):
+        """Copies the weights and activations of each dense layer out of the model for the numpy forward pass
+           Needs to be called again whenever the model's weights change
+           Only networks of biased Dense layers with relu or linear activations can be exported, others need another inference mode
+        """
+        self.inferenceLayers = []
+        for layer in self.model.layers:
+            activation = getattr(layer, 'activation', None)
+            activationName = getattr(activation, '__name__', None)
+            if layer.__class__.__name__ != 'Dense' or activationName not in DeepQAgent.NUMPY_ACTIVATIONS or not layer.use_bias:
+                raise ValueError("Numpy inference only supports biased Dense layers with {0} activations, layer {1} is a {2} with {3} activation, use inference mode {4} or {5}".format(
+                                 DeepQAgent.NUMPY_ACTIVATIONS, layer.name, layer.__class__.__name__, activationName, DeepQAgent.PREDICT_INFERENCE, DeepQAgent.COMPILED_INFERENCE))
+            weights, biases = layer.get_weights()
+            self.inferenceLayers.append((weights.astype(numpy.float32), biases.astype(numpy.float32), activationName == 'relu'))
+
+    def predictRewardsWithNumpy(self, stateData):
+        """Runs the exported dense layers on a row of state features and returns the predicted reward of each move"""
+        return self.predictRewardsBatchWithNumpy(stateData)[0]
+
+    def predictRewardsBatchWithNumpy(self, stateData):
+        """Runs the exported dense layers on rows of state features and returns the predicted rewards of each row"""
+        output = stateData
+        for weights, biases, relu in self.inferenceLayers:
+            output = numpy.dot(output, weights) + biases
+            if relu: numpy.maximum(output, 0, out= output)
+        return output
+
+    def refreshInference(self):
+        """Brings the inference path up to date after the model's weights were changed by training or loading"""
+        if self.inferenceMode == DeepQAgent.NUMPY_INFERENCE: self.exportInferenceWeights()
+        elif self.inferenceMode == DeepQAgent.COMPILED_INFERENCE: self.initializeInference()
+
+    def initializeMemory(self):
+        """Creates the replay memory, memory mapped into the model directory if it persists across reviews"""
+        directory = os.path.join(self.getModelDirectory(), DeepQAgent.REPLAY_MEMORY_DIR) if self.persistentMemory else None
+        if self.prioritizedReplay: return PrioritizedReplayMemory(capacity= self.memoryCapacity, stateSize= self.stateSize, directory= directory)
+        return ReplayMemory(capacity= self.memoryCapacity, stateSize= self.stateSize, directory= directory)
+
+    def prepareForNextFight(self):
+        """Clears the replay memory of the fighter so it can prepare to record the next fight
+           A persistent memory is instead written to disk and kept for the following reviews
+        """
+        if self.persistentMemory: self.memory.flush()
+        else: self.memory.clear()
+
+    def recordStep(self, step):
+        """Encodes the state and next state of the step into features and writes the transition into the replay memory
+
+        Parameters
+        ----------
+        step
+            A tuple containing the observation, state, action, reward, next observation, next state, and done flag
+            See Agent.recordStep for more details
+
+        Returns
+        -------
+        None
+        """
+        self.memory.append(self.featureEncoder.encode(step[Agent.STATE_INDEX], out= self.stateRow[0]), 
+                           step[Agent.ACTION_INDEX], 
+                           step[Agent.REWARD_INDEX],
+                           self.featureEncoder.encode(step[Agent.NEXT_STATE_INDEX], out= self.nextStateRow[0]),
+                           step[Agent.DONE_INDEX])
+
+    def recordFight(self, fight):
+        """Encodes every state and next state of the fight in two batches and writes the transitions into the replay memory at once
+
+        Parameters
+        ----------
+        fight
+            A RecordedFight, see Agent.recordFight
+
+        Returns
+        -------
+        None
+        """
+        if len(fight) == 0: return
+        self.memory.extend((self.featureEncoder.encodeBatch(fight.states), fight.actions, fight.rewards, fight.dones,
+                            self.featureEncoder.encodeBatch(fight.nextStates)))
+
+    def getRolloutParameters(self):
+        """Returns the keyword arguments needed to construct a copy of this Agent inside a rollout worker process"""
+        parameters = super(DeepQAgent, self).getRolloutParameters()
+        parameters.update({'stateSize' : self.stateSize, 'epsilon' : self.epsilon, 'batchSize' : self.batchSize, 'trainingSteps' : self.trainingSteps,
+                           'inferenceMode' : self.inferenceMode, 'targetUpdateInterval' : self.targetUpdateInterval, 
+                           'targetUpdateRate' : self.targetUpdateRate, 'doubleDQN' : self.doubleDQN, 'prioritizedReplay' : self.prioritizedReplay})
+        return parameters
+
+    def getLearnerParameters(self):
+        """Returns the keyword arguments needed to construct the copy of this Agent an AsyncLearner trains, with the same replay memory"""
+        parameters = super(DeepQAgent, self).getLearnerParameters()
+        parameters.update({'persistentMemory' : self.persistentMemory, 'memoryCapacity' : self.memoryCapacity})
+        return parameters
+
+    def releaseMemory(self):
+        """Swaps the replay memory for a small one held in RAM once an AsyncLearner owns the replay memory
+           Only the learner then maps a persistent memory, a stale ring position flushed by the acting Agent would corrupt it
+        """
+        self.persistentMemory = False
+        self.memoryCapacity = DeepQAgent.ACTING_MEMORY_CAPACITY
+        self.memory = self.initializeMemory()
+
+    def getSnapshot(self):
+        """Returns the current network weights and exploration rate so a rollout worker can act like this Agent"""
+        return {'weights' : self.model.get_weights(), 'epsilon' : self.epsilon}
+
+    def loadSnapshot(self, snapshot):
+        """Copies the network weights and exploration rate of the snapshot into this Agent, the target network starts from the same weights"""
+        self.model.set_weights(snapshot['weights'])
+        self.epsilon = snapshot['epsilon']
+        self.refreshInference()
+        if self.targetModel is not None: self.targetModel.set_weights(snapshot['weights'])
+
+    def loadModel(self):
+        """Loads in the pretrained weights and refreshes the inference path and target network to use them"""
+        super(DeepQAgent, self).loadModel()
+        if hasattr(self, 'predictRewards'): self.refreshInference()
+        if self.targetModel is not None: self.targetModel.set_weights(self.model.get_weights())
+
+    def updateTargetNetwork(self, model):
+        """Moves the target network's weights towards the trained model's by the target update rate
+
+        Parameters
+        ----------
+        model
+            The model being trained
+
+        Returns
+        -------
+        None
+        """
+        if self.targetUpdateRate >= 1:
+            self.targetModel.set_weights(model.get_weights())
+        else:
+            rate = self.targetUpdateRate
+            self.targetModel.set_weights([rate * weights + (1 - rate) * targetWeights for weights, targetWeights in zip(model.get_weights(), self.targetModel.get_weights())])
+
+    def reviewFight(self):
+        """Trains on the last fight like every Agent and then refreshes the inference path with the new weights"""
+        super(DeepQAgent, self).reviewFight()
+        self.refreshInference()
+
+    def trainOffline(self, datasetPath):
+        """Trains on steps recorded by a Lobby into TransitionDatasets without running the emulator
+           Each chunk is encoded into features in one batch, then written into the replay memory and reviewed like a fight
+           in slices small enough that the memory never evicts any of their steps before they are trained on
+
+        Parameters
+        ----------
+        datasetPath
+            A dataset directory, or a directory holding several such as one per rollout worker
+
+        Returns
+        -------
+        None
+        """
+        sliceRows = (self.memory.capacity - 1) // 2                                              # Fits even if no step continues the one before it and each takes two slots
+        for directory in TransitionDataset.findDatasets(datasetPath):
+            dataset = TransitionDataset(directory)
+            trainedRows = 0
+            for chunk in dataset.chunks():
+                states = self.featureEncoder.encodeBatch(dataset.getInfoColumns(chunk, TransitionDatasetWriter.STATE_PREFIX))
+                nextStates = self.featureEncoder.encodeBatch(dataset.getInfoColumns(chunk, TransitionDatasetWriter.NEXT_STATE_PREFIX))
+                actions, rewards, dones = numpy.asarray(chunk['action']), numpy.asarray(chunk['reward']), numpy.asarray(chunk['done'])
+                for start in range(0, len(actions), sliceRows):
+                    rows = slice(start, start + sliceRows)
+                    self.memory.extend((states[rows], actions[rows], rewards[rows], dones[rows], nextStates[rows]))
+                    trainedRows += len(actions[rows])
+                    self.model = self.trainNetwork(self.memory, self.model)
+                    self.prepareForNextFight()
+            print('Trained on {0} recorded steps from {1}'.format(trainedRows, directory))
+        self.saveModel()
+        self.refreshInference()
+
+    def exportMemory(self):
+        """Returns the recorded transitions as stacked arrays, a compact form to send between processes"""
+        return self.memory.getTransitions()
+
+    def importMemory(self, batch):
+        """Writes a batch of stacked transitions returned by exportMemory into the replay memory"""
+        self.memory.extend(batch)
 
     def getMove(self, obs, info):
         """Returns a set of button inputs generated by the Agent's network after looking at the current observation
@@ -97,14 +376,43 @@ class DeepQAgent(Agent):
             move, frameInputs = self.getRandomMove(info)
             return move, frameInputs
         else:
-            stateData = self.prepareNetworkInputs(info)
-            predictedRewards = self.model.predict(stateData)[0]
+            self.featureEncoder.encode(info, out= self.stateRow[0])
+            stateData = self.stateRow
+            predictedRewards = self.predictRewards(stateData)
             move = numpy.argmax(predictedRewards)
-            frameInputs = self.convertMoveToFrameInputs(list(self.moveList)[move], info) 
+            frameInputs = self.convertMoveIndexToFrameInputs(move, info)
             return move, frameInputs
 
+    def getMoves(self, observations, infos):
+        """Picks a move for each of several environments, running the network once on all of the states that are not explored
+
+        Parameters
+        ----------
+        observations
+            A list of the current observation of each environment
+
+        infos
+            A list of the RAM info dictionaries of each environment
+
+        Returns
+        -------
+        moves
+            A list of (move, frameInputs) tuples in the order of the environments, see getMove
+        """
+        explore = numpy.random.rand(len(infos)) <= self.epsilon
+        moves = [self.getRandomMove(info) if explored else None for info, explored in zip(infos, explore)]
+        greedy = numpy.flatnonzero(~explore)
+        if len(greedy) == 0: return moves
+
+        stateData = self.featureEncoder.encodeBatch([infos[index] for index in greedy])
+        bestMoves = numpy.argmax(self.predictRewardsBatch(stateData), axis= 1)
+        for index, move in zip(greedy, bestMoves):
+            moves[index] = (move, self.convertMoveIndexToFrameInputs(move, infos[index]))
+        return moves
+
     def initializeNetwork(self):
         """Initializes a Neural Net for a Deep-Q learning Model
+           The keras names used here are module globals bound by importFramework, which the constructor calls before this
         
         Parameters   
         ----------
@@ -115,6 +423,7 @@ class DeepQAgent(Agent):
         model
             The initialized neural network model that Agent will interface with to generate game moves
         """
+        importFramework()
         model = Sequential()
         model.add(Dense(48, input_dim= self.stateSize, activation='relu'))
         model.add(Dense(96, activation='relu'))
@@ -146,7 +455,6 @@ class DeepQAgent(Agent):
         # model.add(Dense(self.actionSize, activation='linear'))
         # model.compile(loss=DeepQAgent._huber_loss, optimizer=Adam(lr=self.learningRate))
 
-        print('Successfully initialized model')
         return model
 
     def prepareMemoryForTraining(self, memory):
@@ -155,8 +463,7 @@ class DeepQAgent(Agent):
         Parameters
         ----------
         memory
-            A 2D array where each index is a recording of a state, action, new state, and reward sequence
-            See readme for more details
+            The replay memory the Agent recorded its fights into, states were already encoded into features when recorded
 
         Returns
         -------
@@ -164,17 +471,9 @@ class DeepQAgent(Agent):
             The prepared training data in whatever from the model needs to train
             DeepQ needs a state, action, and reward sequence to train on
             The observation data is thrown out for this model for training
+            The replay memory is handed over as is so trainNetwork can draw minibatches from it
         """
-        data = []
-        for step in self.memory:
-            data.append(
-            [self.prepareNetworkInputs(step[Agent.STATE_INDEX]), 
-            step[Agent.ACTION_INDEX], 
-            step[Agent.REWARD_INDEX],
-            step[Agent.DONE_INDEX],
-            self.prepareNetworkInputs(step[Agent.NEXT_STATE_INDEX])])
-
-        return data
+        return memory
 
     def prepareNetworkInputs(self, step):
         """Generates a feature vector from the current game state information to feed into the network
@@ -188,48 +487,70 @@ class DeepQAgent(Agent):
         -------
         feature vector
             An array extracted from the step that is the same size as the network input layer
-            Takes the form of a 1 x 30 array. With the elements:
-            enemy_health, enemy_x, enemy_y, 8 one hot encoded enemy state elements, 
+            Takes the form of a 1 x 32 float32 array. With the elements:
+            enemy_health, enemy_x, enemy_y, 9 one hot encoded enemy state elements, 
             8 one hot encoded enemy character elements, player_health, player_x, player_y, and finally
-            8 one hot encoded player state elements.
+            9 one hot encoded player state elements.
+            See FeatureEncoder for the lookup tables used to build it
         """
-        feature_vector = []
-        
-        # Enemy Data
-        feature_vector.append(step["enemy_health"])
-        feature_vector.append(step["enemy_x_position"])
-        feature_vector.append(step["enemy_y_position"])
-
-        # one hot encode enemy state
-        # enemy_status - 512 if standing, 514 if crouching, 516 if jumping, 518 blocking, 522 if normal attack, 524 if special attack, 526 if hit stun or dizzy, 532 if thrown
-        oneHotEnemyState = [0] * len(DeepQAgent.stateIndices.keys())
-        if step['enemy_status'] not in DeepQAgent.doneKeys: oneHotEnemyState[DeepQAgent.stateIndices[step["enemy_status"]]] = 1
-        feature_vector += oneHotEnemyState
-
-        # one hot encode enemy character
-        oneHotEnemyChar = [0] * 8
-        oneHotEnemyChar[step["enemy_character"]] = 1
-        feature_vector += oneHotEnemyChar
-
-        # Player Data
-        feature_vector.append(step["health"])
-        feature_vector.append(step["x_position"])
-        feature_vector.append(step["y_position"])
-
-        # player_status - 512 if standing, 514 if crouching, 516 if jumping, 520 blocking, 522 if normal attack, 524 if special attack, 526 if hit stun or dizzy, 532 if thrown
-        oneHotPlayerState = [0] * len(DeepQAgent.stateIndices.keys())
-        if step['status'] not in DeepQAgent.doneKeys: oneHotPlayerState[DeepQAgent.stateIndices[step["status"]]] = 1
-        feature_vector += oneHotPlayerState
-
-        feature_vector = numpy.reshape(feature_vector, [1, self.stateSize])
-        return feature_vector
+        return numpy.reshape(self.featureEncoder.encode(step), [1, self.stateSize])
+
+    def prepareNetworkInputsBatch(self, steps):
+        """Generates the feature vectors of many game states in one vectorized pass
+
+        Parameters
+        ----------
+        steps
+            Either a list of state information dictionaries or a dictionary of RAM info columns with one value per state
+
+        Returns
+        -------
+        feature vectors
+            An array with one row per state, each row laid out like the vector from prepareNetworkInputs
+        """
+        return self.featureEncoder.encodeBatch(steps)
+
+    def computeTargets(self, model, states, actions, rewards, dones, nextStates):
+        """Computes the Q-targets of a minibatch of transitions
+
+        Parameters
+        ----------
+        model
+            The model being trained
+
+        states, actions, rewards, dones, nextStates
+            The stacked columns of the minibatch
+
+        Returns
+        -------
+        targets
+            The model's predicted rewards for each state with the taken move's reward replaced by its bootstrapped target
+
+        errors
+            The temporal difference error of the taken move in each transition
+        """
+        # One predict call covers the states and next states of the whole minibatch
+        predictions = numpy.asarray(model.predict_on_batch(numpy.concatenate([states, nextStates])))
+        targets, nextRewards = predictions[:len(actions)], predictions[len(actions):]
+        if self.targetModel is None:
+            nextValues = numpy.amax(nextRewards, axis= 1)
+        else:
+            targetRewards = numpy.asarray(self.targetModel.predict_on_batch(nextStates))
+            if self.doubleDQN: nextValues = targetRewards[numpy.arange(len(actions)), numpy.argmax(nextRewards, axis= 1)]
+            else: nextValues = numpy.amax(targetRewards, axis= 1)
+
+        rows = numpy.arange(len(actions))
+        actionTargets = rewards + self.gamma * nextValues * ~dones
+        errors = actionTargets - targets[rows, actions]
+        targets[rows, actions] = actionTargets
+        return targets, errors
 
     def trainNetwork(self, data, model):
         """To be implemented in child class, Runs through a training epoch reviewing the training data
         Parameters
         ----------
         data
-            The training data for the model to train on, a 2D array of state, action, reward, sequence
+            The replay memory for the model to train on, minibatches of stacked state, action, reward, done, and next state arrays are drawn from it
 
         model
             The model to train and return the Agent to continue playing with
@@ -238,24 +559,48 @@ class DeepQAgent(Agent):
         model
             The input model now updated after this round of training on data
         """
-        minibatch = random.sample(data, len(data))
         self.lossHistory.losses_clear()
-        for state, action, reward, done, next_state in minibatch:     
-            modelOutput = model.predict(state)[0]
-            if not done:
-                reward = (reward + self.gamma * numpy.amax(model.predict(next_state)[0]))
+        if len(data) == 0: return model
 
-            modelOutput[action] = reward
-            modelOutput = numpy.reshape(modelOutput, [1, self.actionSize])
-            model.fit(state, modelOutput, epochs= 1, verbose= 0, callbacks= [self.lossHistory])
+        batchSize = min(self.batchSize, len(data))
+        for indices, weights in data.iterateMinibatches(batchSize, self.trainingSteps):
+            self.trainStep(data, model, indices, weights)
 
-        if self.epsilon > DeepQAgent.EPSILON_MIN: self.epsilon *= self.epsilonDecay
+        self.decayExploration()
         return model
 
+    def trainStep(self, data, model, indices, weights):
+        """Takes a single gradient step on a minibatch of the replay memory and updates the target network when it is due
+
+        Parameters
+        ----------
+        data
+            The replay memory the minibatch was drawn from, its priorities are updated with the new errors
+
+        model
+            The model to train
+
+        indices
+            The slot indices of the minibatch
+
+        weights
+            The importance sampling weights of the minibatch, or None for uniform sampling
+
+        Returns
+        -------
+        None
+        """
+        states, actions, rewards, dones, nextStates = data.getBatch(indices)
+        targets, errors = self.computeTargets(model, states, actions, rewards, dones, nextStates)
+        model.fit(states, targets, sample_weight= weights, batch_size= len(indices), epochs= 1, verbose= 0, callbacks= [self.lossHistory])
+        data.updatePriorities(indices, errors)
+        self.gradientSteps += 1
+        if self.targetModel is not None and self.gradientSteps % self.targetUpdateInterval == 0: self.updateTargetNetwork(model)
+
+    def decayExploration(self):
+        """Lowers the exploration rate by one step of the decay, called once per reviewed fight"""
+        if self.epsilon > DeepQAgent.EPSILON_MIN: self.epsilon *= self.epsilonDecay
 
-from keras.utils.generic_utils import get_custom_objects
-loss = DeepQAgent._huber_loss
-get_custom_objects().update({"_huber_loss": loss})
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description= 'Processes agent parameters.')
@@ -263,10 +608,39 @@ if __name__ == "__main__":
     parser.add_argument('-l', '--load', action= 'store_true', help= 'Boolean flag for if the user wants to load pre-existing weights')
     parser.add_argument('-e', '--episodes', type= int, default= 10, help= 'Intger representing the number of training rounds to go through, checkpoints are made at the end of each episode')
     parser.add_argument('-n', '--name', type= str, default= None, help= 'Name of the instance that will be used when saving the model or it\'s training logs')
+    parser.add_argument('-b', '--batch_size', type= int, default= DeepQAgent.DEFAULT_BATCH_SIZE, help= 'Integer number of transitions fit together in each gradient step when reviewing a fight')
+    parser.add_argument('-s', '--training_steps', type= int, default= DeepQAgent.DEFAULT_TRAINING_STEPS, help= 'Integer number of gradient steps per review, defaults to one pass over the fight memory')
+    parser.add_argument('-i', '--inference', type= str, default= DeepQAgent.DEFAULT_INFERENCE_MODE, choices= DeepQAgent.INFERENCE_MODES, help= 'How the network is run when picking a move')
+    parser.add_argument('-t', '--target_update', type= int, default= None, help= 'Integer number of gradient steps between target network updates, no target network if left out')
+    parser.add_argument('--tau', type= float, default= DeepQAgent.DEFAULT_TARGET_UPDATE_RATE, help= 'Fraction of the trained weights blended into the target network each update, 1 is a hard copy')
+    parser.add_argument('-d', '--double', action= 'store_true', help= 'Boolean flag for using Double DQN targets, turns on a target network')
+    parser.add_argument('-p', '--prioritized', action= 'store_true', help= 'Boolean flag for sampling training minibatches with prioritized experience replay')
+    parser.add_argument('-m', '--persistent_memory', action= 'store_true', help= 'Boolean flag for keeping the replay memory across reviews and restarts under local_models')
+    parser.add_argument('-c', '--memory_capacity', type= int, default= None, help= 'Integer number of transitions the replay memory holds before evicting the oldest')
+    parser.add_argument('-w', '--workers', type= int, default= None, help= 'Integer number of rollout worker processes that play the save states in parallel')
+    parser.add_argument('--record', type= str, default= None, help= 'Directory to record every played step into as a dataset for offline training')
+    parser.add_argument('-a', '--async_learner', action= 'store_true', help= 'Boolean flag for training in a background thread while the Lobby keeps playing')
+    parser.add_argument('-v', '--environments', type= int, default= None, help= 'Integer number of emulator subprocesses to step in lockstep with batched move selection')
+    parser.add_argument('--profile', action= 'store_true', help= 'Boolean flag for timing each phase of the Lobby\'s frame loop and exporting the report to local_logs')
+    parser.add_argument('--decode_ram', action= 'store_true', help= 'Boolean flag for decoding the RAM info of fast forwarded frames with the RamDecoder instead of retro\'s lookup')
+    parser.add_argument('--early_termination', action= 'store_true', help= 'Boolean flag for ending each fight on the frame its outcome is decided instead of after the knock out animation')
+    parser.add_argument('--measure_early_termination', action= 'store_true', help= 'Boolean flag for running ended fights on to count the emulator frames early termination saves')
+    parser.add_argument('--dataset', type= str, default= None, help= 'Directory of recorded datasets to train on offline instead of playing')
     args = parser.parse_args()
-    qAgent = DeepQAgent(load= args.load, name= args.name)
-
-    from Lobby import Lobby
-    testLobby = Lobby(render= args.render)
-    testLobby.addPlayer(qAgent)
-    testLobby.executeTrainingRun(episodes= args.episodes)
+    qAgent = DeepQAgent(load= args.load, name= args.name, batchSize= args.batch_size, trainingSteps= args.training_steps, inferenceMode= args.inference,
+                        targetUpdateInterval= args.target_update, targetUpdateRate= args.tau, doubleDQN= args.double,
+                        prioritizedReplay= args.prioritized, persistentMemory= args.persistent_memory, memoryCapacity= args.memory_capacity)
+
+    if args.dataset is not None:
+        qAgent.trainOffline(args.dataset)
+    elif args.environments is not None:
+        from VectorLobby import VectorLobby
+        vectorLobby = VectorLobby(environments= args.environments, earlyTermination= args.early_termination)
+        vectorLobby.addPlayer(qAgent)
+        vectorLobby.executeTrainingRun(episodes= args.episodes)
+    else:
+        from Lobby import Lobby
+        testLobby = Lobby(render= args.render, recordingPath= args.record, profile= args.profile, displayThread= True, decodeRam= args.decode_ram,
+                          earlyTermination= args.early_termination or args.measure_early_termination, measureEarlyTermination= args.measure_early_termination)
+        testLobby.addPlayer(qAgent)
+        testLobby.executeTrainingRun(episodes= args.episodes, workers= args.workers, asyncLearning= args.async_learner)
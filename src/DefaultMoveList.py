@@ -44,8 +44,10 @@ class Moves(Enum):
 
     def isDirectionalMove(move):
         """Determines if the selected move's inputs are depend on the players direction"""
-        if move == Moves.Fireball or move == Moves.HurricaneKick or move == Moves.DragonUppercut:
-            return True
+        return move in DirectionalMoves
+
+# The moves whose inputs depend on which direction the player is facing
+DirectionalMoves = frozenset([Moves.Fireball, Moves.HurricaneKick, Moves.DragonUppercut])
 
 """
     Dictionary mapping the move enum types to the set of frame inputs
@@ -6,41 +6,87 @@ All credit too open-ai's examples: https://github.com/openai/retro/blob/master/r
 import gym
 import numpy as np
 import retro
+from DefaultMoveList import Moves
 
 class Discretizer(gym.ActionWrapper):
     """
     Wrap a gym environment and make it use discrete actions.
+    The button arrays of all actions are rows of one read-only table, so action hands out a row without copying it,
+    and flags describing each action are worked out once so they can be checked every frame with an array lookup.
     Args:
         combos: ordered list of lists of valid button combinations
+        attack_buttons: buttons that make an action an attack, flagged in has_attack_button
     """
 
-    def __init__(self, env, combos):
+    # Bit set in direction_bits for each direction an action holds
+    DIRECTION_BITS = {'UP' : 1, 'DOWN' : 2, 'LEFT' : 4, 'RIGHT' : 8}
+
+    def __init__(self, env, combos, attack_buttons=()):
         super().__init__(env)
         assert isinstance(env.action_space, gym.spaces.MultiBinary)
         buttons = env.unwrapped.buttons
-        self._decode_discrete_action = []
+        self._decode_discrete_action = np.zeros((len(combos), env.action_space.n), dtype=bool)
         self._combos = combos
-        for combo in combos:
-            arr = np.array([False] * env.action_space.n)
+        for act, combo in enumerate(combos):
             for button in combo:
-                arr[buttons.index(button)] = True
-            self._decode_discrete_action.append(arr)
+                self._decode_discrete_action[act, buttons.index(button)] = True
+        self._decode_discrete_action.setflags(write=False)
+
+        self.has_attack_button = np.array([any(button in combo for button in attack_buttons) for combo in combos])
+        self.direction_bits = np.array([sum(bit for direction, bit in Discretizer.DIRECTION_BITS.items() if direction in combo) for combo in combos], dtype=np.uint8)
+        self.has_attack_button.setflags(write=False)
+        self.direction_bits.setflags(write=False)
 
-        self.action_space = gym.spaces.Discrete(len(self._decode_discrete_action))
+        self.action_space = gym.spaces.Discrete(len(combos))
 
     def action(self, act):
-        return self._decode_discrete_action[act].copy()
+        return self._decode_discrete_action[act]
 
     def get_action_meaning(self, act):
         return self._combos[act]
 
+    def step_without_observation(self, act):
+        """
+        Advance the emulator one frame like step but skip copying the screen into an observation.
+        Returns the reward, done flag and RAM info of the frame.
+        """
+        env = self.env.unwrapped
+        for player, buttons in enumerate(env.action_to_array(self.action(act))):
+            env.em.set_button_mask(buttons, player)
+        env.em.step()
+        env.data.update_ram()
+        reward, done, info = env.compute_step()
+        return reward, bool(done), info
+
+    def step_ram(self, act):
+        """
+        Advance the emulator one frame like step_without_observation but skip retro's lookup of every RAM variable.
+        Returns the reward, done flag and the raw RAM of the frame, for a RamDecoder to decode.
+        """
+        env = self.env.unwrapped
+        for player, buttons in enumerate(env.action_to_array(self.action(act))):
+            env.em.set_button_mask(buttons, player)
+        env.em.step()
+        env.data.update_ram()
+        if env.players > 1: reward = [env.data.current_reward(player) for player in range(env.players)]
+        else: reward = env.data.current_reward()
+        return reward, bool(env.data.is_done()), env.get_ram()
+
+    def observe(self):
+        """
+        Build the observation of the current frame, as step would have returned it.
+        """
+        return self.env.unwrapped._update_obs()
+
 class StreetFighter2Discretizer(Discretizer):
     """
     Use Street Fighter 2
     based on https://github.com/openai/retro-baselines/blob/master/agents/sonic_util.py
     """
+    ATTACK_BUTTONS = ['X', 'Y', 'Z', 'A', 'B', 'C']
+
     def __init__(self, env):
-        super().__init__(env=env, combos=[[], 
+        super().__init__(env=env, attack_buttons=StreetFighter2Discretizer.ATTACK_BUTTONS, combos=[[], 
                                          ['UP'], 
                                          ['DOWN'], 
                                          ['LEFT'], 
@@ -79,6 +125,65 @@ class StreetFighter2Discretizer(Discretizer):
                                          ['RIGHT', 'Z'],
                                          ['DOWN', 'RIGHT', 'Z']])
 
+class MacroActionWrapper(gym.Wrapper):
+    """
+    Wrap a Discretizer so a whole move from a move list is entered with a single step.
+    The button masks of every discrete action are worked out once, and the frames of the move only advance the
+    emulator and add up the reward. Retro's RAM info and the observation are only built for the last frame.
+    Args:
+        env: a Discretizer, such as StreetFighter2Discretizer
+        move_list: enum of the moves step accepts, with getMoveInputs and isDirectionalMove like DefaultMoveList.Moves
+    """
+
+    def __init__(self, env, move_list=Moves):
+        super().__init__(env)
+        retro_env = env.unwrapped
+        self._frame_masks = [retro_env.action_to_array(env.action(act)) for act in range(env.action_space.n)]
+        self._move_inputs = {}
+        for move in move_list:
+            inputs = move_list.getMoveInputs(move)
+            if move_list.isDirectionalMove(move): self._move_inputs[move] = (inputs[0], inputs[1])
+            else: self._move_inputs[move] = (inputs, inputs)
+        self.ram_decoder = None         # Set to a RamDecoder to decode the last frame's info from the RAM instead of retro's lookup
+        self.last_info = None
+        self.frames_stepped = 0         # Frames entered by the last step, fewer than the move's if the game ended during it
+
+    def reset(self, **kwargs):
+        self.last_info = None
+        return self.env.reset(**kwargs)
+
+    def step(self, move):
+        """
+        Enter every frame of a move, with its directional inputs turned to face the enemy in the last frame's info.
+        Returns the last observation, the summed reward, the done flag and the info of the last frame.
+        """
+        facing_right, facing_left = self._move_inputs[move]
+        info = self.last_info
+        if info is None or info['x_position'] < info['enemy_x_position']: return self.step_frame_inputs(facing_right)
+        return self.step_frame_inputs(facing_left)
+
+    def step_frame_inputs(self, frame_inputs, observe=True):
+        """
+        Enter a sequence of discrete actions, one per frame, stopping early if the game ends.
+        Returns the observation of the last frame, or None if observe is False, the summed reward, the done flag and the info of the last frame.
+        """
+        env = self.env.unwrapped
+        reward, done, frames = 0, False, 0
+        for act in frame_inputs:
+            for player, buttons in enumerate(self._frame_masks[act]):
+                env.em.set_button_mask(buttons, player)
+            env.em.step()
+            env.data.update_ram()
+            frames += 1
+            if env.players > 1: reward = np.add(reward, [env.data.current_reward(player) for player in range(env.players)])
+            else: reward += env.data.current_reward()
+            done = env.data.is_done()
+            if done: break
+        self.frames_stepped = frames
+        info = self.ram_decoder.decode(env.get_ram()) if self.ram_decoder is not None else env.data.lookup_all()
+        self.last_info = info
+        return env._update_obs() if observe else None, reward, bool(done), info
+
 """
     Initializes an example discrete environment and randomly selects moves for the agent to make.
     The meaning of each selected move in terms of what buttons are being pressed is also displayed.
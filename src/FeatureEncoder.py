@@ -0,0 +1,114 @@
+import numpy
+
+class FeatureEncoder():
+    """Turns RAM info from the game into the DeepQAgent's network input features.
+       Status and character codes are one hot encoded through lookup tables built once, and the features are
+       written straight into preallocated float32 rows. The layout of a row is:
+       enemy_health, enemy_x, enemy_y, 9 one hot enemy status elements, 8 one hot enemy character elements,
+       player_health, player_x, player_y, and 9 one hot player status elements.
+    """
+
+    # Mapping between player state values and their one hot encoding index
+    STATUS_INDICES = {512 : 0, 514 : 1, 516 : 2, 518 : 3, 520 : 4, 522 : 5, 524 : 6, 526 : 7, 532 : 8}
+    CHARACTER_COUNT = 8                                       # Number of enemy characters in the one hot encoding
+    MAX_STATUS = 2048                                         # Status codes at or above this are treated as having no one hot index
+
+    # Offsets of each block of features inside a row
+    ENEMY_HEALTH = 0
+    ENEMY_X = 1
+    ENEMY_Y = 2
+    ENEMY_STATUS = 3
+    ENEMY_CHARACTER = ENEMY_STATUS + len(STATUS_INDICES)
+    HEALTH = ENEMY_CHARACTER + CHARACTER_COUNT
+    X = HEALTH + 1
+    Y = HEALTH + 2
+    STATUS = HEALTH + 3
+    FEATURE_COUNT = STATUS + len(STATUS_INDICES)
+
+    # Features copied as they are from the info, paired with their offset in the row
+    PLAIN_FIELDS = [('enemy_health', ENEMY_HEALTH), ('enemy_x_position', ENEMY_X), ('enemy_y_position', ENEMY_Y),
+                    ('health', HEALTH), ('x_position', X), ('y_position', Y)]
+
+    def __init__(self):
+        """Builds the lookup tables from status codes to the column of their one hot element
+           Codes without an index, such as the ones at the end of a round, map to -1 and set no element
+        """
+        self.statusColumns = numpy.full(FeatureEncoder.MAX_STATUS, -1, dtype= numpy.int64)
+        for status, index in FeatureEncoder.STATUS_INDICES.items():
+            self.statusColumns[status] = index
+
+    def statusColumn(self, status):
+        """Returns the one hot index of a status code, or -1 if it has none"""
+        if 0 <= status < FeatureEncoder.MAX_STATUS: return self.statusColumns[status]
+        return -1
+
+    def encode(self, info, out= None):
+        """Encodes a single RAM info record into a feature row
+
+        Parameters
+        ----------
+        info
+            A dictionary, or any record indexable by field name, of the RAM info of a game state
+
+        out
+            An optional preallocated float32 array of FEATURE_COUNT elements to write the features into
+
+        Returns
+        -------
+        out
+            The feature row
+        """
+        if out is None: out = numpy.zeros(FeatureEncoder.FEATURE_COUNT, dtype= numpy.float32)
+        else: out[:] = 0
+
+        for field, offset in FeatureEncoder.PLAIN_FIELDS:
+            out[offset] = info[field]
+        column = self.statusColumn(info['enemy_status'])
+        if column >= 0: out[FeatureEncoder.ENEMY_STATUS + column] = 1
+        out[FeatureEncoder.ENEMY_CHARACTER + info['enemy_character']] = 1
+        column = self.statusColumn(info['status'])
+        if column >= 0: out[FeatureEncoder.STATUS + column] = 1
+        return out
+
+    def encodeBatch(self, infos, out= None):
+        """Encodes many RAM info records in one vectorized pass
+
+        Parameters
+        ----------
+        infos
+            Either a list of info dictionaries or a dictionary mapping each field name to an array with one value per record
+
+        out
+            An optional preallocated float32 array of shape (records, FEATURE_COUNT) to write the features into
+
+        Returns
+        -------
+        out
+            The feature rows, one per record
+        """
+        if not isinstance(infos, dict):
+            fields = [field for field, _ in FeatureEncoder.PLAIN_FIELDS] + ['enemy_status', 'enemy_character', 'status']
+            infos = {field : numpy.fromiter((info[field] for info in infos), dtype= numpy.int64, count= len(infos)) for field in fields}
+
+        records = len(infos['status'])
+        if out is None: out = numpy.zeros((records, FeatureEncoder.FEATURE_COUNT), dtype= numpy.float32)
+        else: out[:] = 0
+
+        rows = numpy.arange(records)
+        for field, offset in FeatureEncoder.PLAIN_FIELDS:
+            out[:, offset] = infos[field]
+        self.setOneHot(out, rows, FeatureEncoder.ENEMY_STATUS, self.batchStatusColumns(infos['enemy_status']))
+        self.setOneHot(out, rows, FeatureEncoder.ENEMY_CHARACTER, numpy.asarray(infos['enemy_character'], dtype= numpy.int64))
+        self.setOneHot(out, rows, FeatureEncoder.STATUS, self.batchStatusColumns(infos['status']))
+        return out
+
+    def batchStatusColumns(self, statuses):
+        """Returns the one hot index of every status code in the array, -1 for codes without one"""
+        statuses = numpy.asarray(statuses, dtype= numpy.int64)
+        inRange = (statuses >= 0) & (statuses < FeatureEncoder.MAX_STATUS)
+        return numpy.where(inRange, self.statusColumns[numpy.where(inRange, statuses, 0)], -1)
+
+    def setOneHot(self, out, rows, offset, columns):
+        """Sets the one hot element of each row whose column is not -1"""
+        hasColumn = columns >= 0
+        out[rows[hasColumn], offset + columns[hasColumn]] = 1
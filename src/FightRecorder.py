@@ -0,0 +1,176 @@
+import numpy
+
+class RecordedFight():
+    """A fight recorded by a FightRecorder, held as columns with one row per decision.
+       states and nextStates map each RAM info field to its column, the next states are the same rows as the
+       states shifted by one. The columns are views into the recorder's buffers and are overwritten by the next
+       fight it records, anything kept past recordFight has to be copied, see copy.
+    """
+
+    def __init__(self, states, nextStates, actions, rewards, dones, observations= None, nextObservations= None):
+        self.states = states
+        self.nextStates = nextStates
+        self.actions = actions
+        self.rewards = rewards
+        self.dones = dones
+        self.observations = observations
+        self.nextObservations = nextObservations
+
+    def __len__(self):
+        """Returns the number of decisions in the fight"""
+        return len(self.actions)
+
+    def copy(self):
+        """Returns a copy of the fight that owns its columns, so it stays valid after the recorder moves on"""
+        # The states and next states are copied together so they keep sharing their rows
+        fields = list(self.states.keys())
+        stateColumns = {field : numpy.concatenate([self.states[field], self.nextStates[field][-1:]]) for field in fields}
+        observations = None
+        if self.observations is not None: observations = numpy.concatenate([self.observations, self.nextObservations[-1:]])
+        return RecordedFight({field : stateColumns[field][:-1] for field in fields}, {field : stateColumns[field][1:] for field in fields},
+                             self.actions.copy(), self.rewards.copy(), self.dones.copy(),
+                             None if observations is None else observations[:-1], None if observations is None else observations[1:])
+
+    def getInfo(self, row, nextState= False):
+        """Rebuilds the RAM info dictionary of the state, or next state, of a decision"""
+        columns = self.nextStates if nextState else self.states
+        return {field : column[row].item() for field, column in columns.items()}
+
+    def steps(self, observations= True):
+        """Yields the fight as the step tuples taken by Agent.recordStep
+
+        Parameters
+        ----------
+        observations
+            Whether to include the recorded frames, if False or none were recorded the observation fields are None
+
+        Returns
+        -------
+        steps
+            A generator of (observation, state, action, reward, nextObservation, nextState, done) tuples
+            Each step owns its values, the frames are copied out of the columns so they can be kept past the next fight
+        """
+        keepObservations = observations and self.observations is not None
+        for row in range(len(self)):
+            yield (self.observations[row].copy() if keepObservations else None, self.getInfo(row), self.actions[row].item(), self.rewards[row].item(),
+                   self.nextObservations[row].copy() if keepObservations else None, self.getInfo(row, nextState= True), bool(self.dones[row]))
+
+
+class FightRecorder():
+    """Records the decisions of a fight into preallocated numpy columns instead of a tuple and info dictionary per step.
+       Each RAM field from data.json gets a column of its declared type, the columns are the fields of one structured
+       array so a record decoded by a RamDecoder is written with a single assignment. Row i of the info columns is the
+       state of decision i and row i + 1 its next state, so every state is written once. The columns are reused from
+       fight to fight and doubled in length whenever a fight outgrows them.
+    """
+
+    DEFAULT_CAPACITY = 4096                                   # Decisions the columns hold before they grow, a fight is about 2000
+
+    def __init__(self, infoFields, observationShape= None, capacity= DEFAULT_CAPACITY):
+        """Allocates the columns
+
+        Parameters
+        ----------
+        infoFields
+            A list of (name, dtype) pairs of the RAM info fields to record, see Lobby.getInfoFields
+
+        observationShape
+            The shape of the prepared frame stored with each state, if None no frames are stored
+
+        capacity
+            The number of decisions the columns start out holding
+
+        Returns
+        -------
+        None
+        """
+        self.infoFields = infoFields
+        self.observationShape = None if observationShape is None else tuple(observationShape)
+        self.capacity = 0
+        self.rows = 0                                         # Decisions recorded in the current fight
+        self.recordType = None                                # The dtype of the last decoded record written whole
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        """Allocates columns holding capacity decisions, keeping the rows recorded so far"""
+        infoRecords = numpy.zeros(capacity + 1, dtype= numpy.dtype(self.infoFields))
+        actions = numpy.zeros(capacity, dtype= numpy.int64)
+        rewards = numpy.zeros(capacity, dtype= numpy.float32)
+        dones = numpy.zeros(capacity, dtype= numpy.bool_)
+        observations = None if self.observationShape is None else numpy.zeros((capacity + 1,) + self.observationShape, dtype= numpy.uint8)
+        if self.capacity > 0:
+            rows = self.rows
+            infoRecords[:rows + 1] = self.infoRecords[:rows + 1]
+            actions[:rows], rewards[:rows], dones[:rows] = self.actions[:rows], self.rewards[:rows], self.dones[:rows]
+            if observations is not None: observations[:rows + 1] = self.observations[:rows + 1]
+        self.capacity = capacity
+        self.infoRecords, self.actions, self.rewards, self.dones, self.observations = infoRecords, actions, rewards, dones, observations
+        self.columnList = [(name, infoRecords[name]) for name, _ in self.infoFields]                # Iterated on every decision, cheaper than a dictionary
+
+    def writeInfo(self, row, info, observation):
+        """Writes the RAM info and frame of a state into a row of the info columns, info is either a dictionary or a decoded record"""
+        if isinstance(info, numpy.void) and (info.dtype is self.recordType or info.dtype == self.infoRecords.dtype):
+            self.recordType = info.dtype                                                            # Records of one decoder share their dtype, so later checks are by identity
+            self.infoRecords[row] = info
+        else:
+            for name, column in self.columnList:
+                column[row] = info[name]
+        if self.observations is not None and observation is not None: self.observations[row] = observation
+
+    def start(self, info, observation= None):
+        """Starts recording a new fight from the state the Agent first acts in
+
+        Parameters
+        ----------
+        info
+            The RAM info of the first state, a dictionary or a record decoded by a RamDecoder
+
+        observation
+            The prepared frame of the first state, only stored if the recorder was given an observation shape
+
+        Returns
+        -------
+        None
+        """
+        self.rows = 0
+        self.writeInfo(0, info, observation)
+
+    def record(self, action, reward, nextInfo, done, nextObservation= None):
+        """Records a decision, the state it was made in is the next state of the decision before it
+
+        Parameters
+        ----------
+        action
+            Integer representing the move the Agent chose
+
+        reward
+            The reward the Agent received for that move
+
+        nextInfo
+            The RAM info of the state the move led to
+
+        done
+            Whether or not the next state ended the fight
+
+        nextObservation
+            The prepared frame of the next state
+
+        Returns
+        -------
+        None
+        """
+        row = self.rows
+        if row == self.capacity: self.allocate(2 * self.capacity)
+        self.actions[row] = action
+        self.rewards[row] = reward
+        self.dones[row] = done
+        self.writeInfo(row + 1, nextInfo, nextObservation)
+        self.rows = row + 1
+
+    def getFight(self):
+        """Returns the fight recorded so far as a RecordedFight of views into the columns"""
+        rows = self.rows
+        observations = self.observations
+        return RecordedFight({name : column[:rows] for name, column in self.columnList}, {name : column[1:rows + 1] for name, column in self.columnList},
+                             self.actions[:rows], self.rewards[:rows], self.dones[:rows],
+                             None if observations is None else observations[:rows], None if observations is None else observations[1:rows + 1])
@@ -0,0 +1,77 @@
+import threading, time, sys
+from collections import deque
+
+class FrameDisplay(threading.Thread):
+    """Shows the frames of a Lobby in a window drawn by its own thread so rendering never holds up the emulator.
+       The Lobby hands over each frame without waiting and the thread draws them at the playback speed. Frames wait
+       in a bounded queue that drops the oldest frame when it is full, so when the game runs faster than the display
+       the window skips ahead instead of falling further and further behind.
+       The window is created inside the thread, which macOS does not allow, so the display thread is unsupported there.
+    """
+
+    DEFAULT_QUEUE_SIZE = 8                                    # Frames waiting to be drawn before the oldest are dropped
+    FRAME_RATE = 1 / 115                                      # Seconds between frames at a playback speed of 1, same as Lobby.FRAME_RATE
+    UNSUPPORTED_PLATFORMS = ['darwin']                        # Platforms that only allow windows on the main thread
+
+    @staticmethod
+    def isSupported():
+        """Static method that returns whether windows can be drawn from a thread other than the main thread on this platform"""
+        return sys.platform not in FrameDisplay.UNSUPPORTED_PLATFORMS
+
+    def __init__(self, playbackSpeed= 1.0, queueSize= DEFAULT_QUEUE_SIZE):
+        """Starts the display thread
+
+        Parameters
+        ----------
+        playbackSpeed
+            How many times faster than real time frames are drawn, None draws every frame as soon as it arrives
+
+        queueSize
+            The number of frames that can wait to be drawn
+
+        Returns
+        -------
+        None
+        """
+        super(FrameDisplay, self).__init__(name= 'FrameDisplay', daemon= True)
+        self.frameInterval = None if not playbackSpeed else FrameDisplay.FRAME_RATE / playbackSpeed
+        self.frames = deque(maxlen= queueSize)
+        self.condition = threading.Condition()
+        self.closing = False
+        self.shownFrames = 0
+        self.droppedFrames = 0
+        self.start()
+
+    def show(self, frame):
+        """Queues a frame to be drawn and returns immediately, dropping the oldest waiting frame if the queue is full"""
+        with self.condition:
+            if len(self.frames) == self.frames.maxlen: self.droppedFrames += 1
+            self.frames.append(frame)
+            self.condition.notify()
+
+    def run(self):
+        """Draws queued frames at the playback speed until closed"""
+        from gym.envs.classic_control.rendering import SimpleImageViewer
+        viewer = SimpleImageViewer()
+        nextFrameTime = time.perf_counter()
+        while True:
+            with self.condition:
+                while not self.frames and not self.closing:
+                    self.condition.wait()
+                if self.closing: break
+                frame = self.frames.popleft()
+
+            viewer.imshow(frame)
+            self.shownFrames += 1
+            if self.frameInterval is not None:
+                nextFrameTime = max(nextFrameTime + self.frameInterval, time.perf_counter() - self.frameInterval)
+                delay = nextFrameTime - time.perf_counter()
+                if delay > 0: time.sleep(delay)
+        viewer.close()
+
+    def close(self):
+        """Stops drawing, closes the window and waits for the thread to finish"""
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        self.join()
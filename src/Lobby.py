@@ -1,6 +1,12 @@
-import argparse, retro, os, time
+import argparse, retro, os, time, json, numpy, multiprocessing
 from enum import Enum
-from Discretizer import StreetFighter2Discretizer
+from Discretizer import StreetFighter2Discretizer, MacroActionWrapper
+from TransitionDataset import TransitionDatasetWriter
+from FightRecorder import FightRecorder
+from RamDecoder import RamDecoder
+from AsyncLearner import AsyncLearner
+from LobbyProfiler import LobbyProfiler, NullProfiler
+from FrameDisplay import FrameDisplay
 
 # Used incase too many players are added to the lobby
 class Lobby_Full_Exception(Exception):
@@ -33,6 +39,11 @@ class Lobby():
     # when the next button inputs are picked ups
     JUMP_LAG = 4
 
+    # Variables used to end a fight as soon as its outcome is decided
+    WINS_NEEDED = 2                                                                                # Round wins that end a fight in scenario.json
+    ROUND_REWARD = 100                                                                             # Reward reward_script.lua gives for winning a round and takes for losing one
+    MAX_RUN_OUT_FRAMES = 20000                                                                     # Most frames an ended fight is run out for when measuring the frames saved
+
     FRAME_RATE = 1 / 115                                                                           # The time between frames if real time is enabled
 
     ### End of static variables 
@@ -55,9 +66,41 @@ class Lobby():
         states = [file.split('.')[0] for file in files if file.split('.')[1] == 'state']
         return states
 
+    def getInfoVariables():
+        """Static method that reads the RAM variables declared in data.json
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        variables
+            A dictionary mapping each variable's name to its address and type
+        """
+        with open('../StreetFighterIISpecialChampionEdition-Genesis/data.json') as file:
+            return json.load(file)['info']
+
+    def getInfoFields():
+        """Static method that reads the RAM info fields declared in data.json along with the numpy type to store each one as
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        fields
+            A list of (name, dtype) pairs in the order they are declared
+            Integer fields keep their declared size in native byte order, retro's decimal and nibble types are stored as int64
+        """
+        return RamDecoder.getFields(Lobby.getInfoVariables())
+
     ### End of static methods
 
-    def __init__(self, game= 'StreetFighterIISpecialChampionEdition-Genesis', render= False, mode= Lobby_Modes.SINGLE_PLAYER):
+    def __init__(self, game= 'StreetFighterIISpecialChampionEdition-Genesis', render= False, mode= Lobby_Modes.SINGLE_PLAYER, reuseEnvironment= True, fastForward= True,
+                 recordingPath= None, recordObservations= False, profile= False, displayThread= False, playbackSpeed= 1.0, ramObservations= None, decodeRam= False,
+                 earlyTermination= False, measureEarlyTermination= False):
         """Initializes the agent and the underlying neural network
 
         Parameters
@@ -71,6 +114,46 @@ class Lobby():
         mode
             An enum type that describes whether this lobby is for single player or two player matches
 
+        reuseEnvironment
+            A boolean flag that keeps one emulator alive across fights and swaps save states in memory
+            If False a new emulator is made for every fight and closed when the fight is over
+
+        fastForward
+            A boolean flag that steps through frames the Agent can not act on without building observations for them
+            Only the frame the Agent is finally able to act on is turned into an observation, ignored while rendering
+
+        recordingPath
+            A directory to stream every recorded step into as a TransitionDataset for offline training, if None nothing is written
+
+        recordObservations
+            A boolean flag that also writes the player's prepared frame of each step into the recording
+
+        profile
+            A boolean flag that times each phase of the frame loop and reports it per episode, see LobbyProfiler
+
+        displayThread
+            A boolean flag that hands rendered frames to a FrameDisplay thread instead of drawing and sleeping inside the frame loop
+            The game then runs at full speed while it is being watched and the display skips frames it cannot keep up with
+            Ignored on platforms FrameDisplay does not support, such as macOS, where frames are drawn on the main thread
+
+        playbackSpeed
+            How many times faster than real time rendered frames are shown, None shows them as fast as possible
+
+        ramObservations
+            A boolean flag that makes the emulator return its RAM as the observation instead of copying out the screen every frame
+            If None the RAM is used whenever no player requires observations and frames are neither rendered nor recorded
+
+        decodeRam
+            A boolean flag that decodes the RAM info of fast forwarded frames with a RamDecoder instead of retro's lookup of every variable
+            The info is then a numpy record indexable by field name rather than a dictionary, see RamDecoder
+
+        earlyTermination
+            A boolean flag that ends each fight on the frame its outcome is decided instead of waiting for scenario.json's done condition
+            Retro only ends a fight once the deciding round is counted after the knock out animation and win poses, or when the continue timer runs out
+
+        measureEarlyTermination
+            A boolean flag that runs the emulator on to retro's end of every fight ended early, without recording it, to count the frames early termination saves
+
         Returns
         -------
         None
@@ -78,6 +161,27 @@ class Lobby():
         self.game = game
         self.render = render
         self.mode = mode
+        self.reuseEnvironment = reuseEnvironment
+        self.fastForward = fastForward
+        self.ramObservations = ramObservations
+        self.resetFrameCounts()
+        self.environment = None
+        self.environmentObservesRam = None                                                         # Whether the current emulator was made with RAM observations
+        self.macroEnvironment = None                                                               # Enters a whole move per call on top of the environment
+        self.decodeRam = decodeRam
+        self.ramDecoder = None                                                                     # Made once the decoded RAM has been checked against retro's lookup
+        self.earlyTermination = earlyTermination
+        self.measureEarlyTermination = measureEarlyTermination
+        self.savedStates = {}                                                                      # Save state name to the raw state bytes already read from disk
+        self.recordingPath = recordingPath
+        self.recordObservations = recordObservations
+        self.recorder = None                                                                       # Opened on the first fight once the frame shape is known
+        self.learner = None                                                                        # Background learner recorded fights are handed to in asynchronous runs
+        self.fightRecorder = None                                                                  # Columns each fight is recorded into, sized on the first fight
+        self.profiler = LobbyProfiler() if profile else NullProfiler()
+        self.playbackSpeed = playbackSpeed
+        if render and displayThread and not FrameDisplay.isSupported(): print('The display thread is not supported on this platform, rendering on the main thread')
+        self.display = FrameDisplay(playbackSpeed= playbackSpeed) if render and displayThread and FrameDisplay.isSupported() else None
         self.clearLobby()
 
     def initEnvironment(self, state):
@@ -92,16 +196,116 @@ class Lobby():
         -------
         None
         """
-        self.environment = retro.make(game= self.game, state= state, players= self.mode.value)
-        self.environment = StreetFighter2Discretizer(self.environment)
+        observeRam = self.usesRamObservations()
+        if self.environment is not None and self.environmentObservesRam != observeRam: self.closeEnvironment()
+        if self.environment is None:
+            self.environment = self.makeEnvironment(state, observeRam)
+            self.environmentObservesRam = observeRam
+            self.macroEnvironment = MacroActionWrapper(self.environment)
+        self.loadState(state)
         self.environment.reset()                
         # The initial observation and state info are gathered by doing nothing the first frame and viewing the return data                                               
         self.lastObservation, _, _, self.lastInfo = self.environment.step(Lobby.NO_ACTION)                   
+        if self.decodeRam and self.ramDecoder is None: self.ramDecoder = RamDecoder.forEnvironment(self.environment.unwrapped, Lobby.getInfoVariables())
+        if self.ramDecoder is not None: self.lastInfo = self.ramDecoder.decode(self.environment.unwrapped.get_ram())
+        self.macroEnvironment.ram_decoder = self.ramDecoder
         self.lastAction, self.frameInputs = 0, [Lobby.NO_ACTION]
         self.currentJumpFrame = 0
         self.done = False
-        while not self.isActionableState(self.lastInfo, Lobby.NO_ACTION):
-            self.lastObservation, _, _, self.lastInfo = self.environment.step(Lobby.NO_ACTION)
+        self.roundWins = None                                                                      # Rounds each side had won going into the round being fought
+        self.lastReward = 0
+        self.lastInfo, self.lastObservation = self.waitForNextActionableState(self.lastInfo, self.lastObservation)
+
+    def usesRamObservations(self):
+        """Returns whether the next emulator should return its RAM as the observation rather than the screen
+           The players only read the RAM info unless they declare requiresObservations, so copying the screen out
+           of the emulator every frame is wasted unless it is rendered or recorded
+        """
+        if self.ramObservations is not None: return self.ramObservations
+        if self.render or (self.recordingPath is not None and self.recordObservations): return False
+        return not any(player is not None and player.requiresObservations for player in self.players)
+
+    def makeEnvironment(self, state, ramObservations= False):
+        """Creates the emulator and wraps it in the discretized action space
+
+        Parameters
+        ----------
+        state
+            A string of the name of the save state the emulator starts in
+
+        ramObservations
+            A boolean flag that makes the emulator return its RAM as the observation instead of the screen
+
+        Returns
+        -------
+        environment
+            The wrapped retro environment
+        """
+        observationType = retro.Observations.RAM if ramObservations else retro.Observations.IMAGE
+        environment = retro.make(game= self.game, state= state, players= self.mode.value, obs_type= observationType)
+        return StreetFighter2Discretizer(environment)
+
+    def loadState(self, state):
+        """Swaps the save state the environment will start from on its next reset without rebuilding the emulator
+           The state file is only read from disk the first time it is loaded
+
+        Parameters
+        ----------
+        state
+            A string of the name of the save state to load
+
+        Returns
+        -------
+        None
+        """
+        emulator = self.environment.unwrapped
+        if state not in self.savedStates:
+            emulator.load_state(state)
+            self.savedStates[state] = emulator.initial_state
+        emulator.initial_state = self.savedStates[state]
+        emulator.statename = state + '.state'
+
+    def closeEnvironment(self):
+        """Shuts down the emulator and any render window so the next fight starts with a new one
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.environment is None: return
+        self.environment.close()
+        if self.render and self.environment.unwrapped.viewer is not None: self.environment.unwrapped.viewer.close()
+        self.environment = None
+        self.environmentObservesRam = None
+        self.macroEnvironment = None
+        self.ramDecoder = None
+
+    def resetFrameCounts(self):
+        """Zeroes the counts of emulated frames, of frames that were skipped without building an observation, of fights ended early and the
+           frames that saved, and the time spent emulating
+        """
+        self.emulatedFrames = 0
+        self.skippedFrames = 0
+        self.earlyTerminations = 0
+        self.savedFrames = 0                                                                       # Only counted when measuring early termination
+        self.emulationTime = 0.0
+
+    def getSkippedFrameFraction(self):
+        """Returns the fraction of emulated frames since the counts were last reset that were skipped without an observation"""
+        if self.emulatedFrames == 0: return 0.0
+        return self.skippedFrames / self.emulatedFrames
+
+    def reportEarlyTermination(self):
+        """Prints how many fights were ended early since the counts were last reset and, when measured, how many emulator frames that saved"""
+        if not self.measureEarlyTermination:
+            print('Ended {0} fights early'.format(self.earlyTerminations))
+            return
+        print('Ended {0} fights early, saving {1} emulator frames, {2:.1%} of the frames retro would have emulated'.format(
+              self.earlyTerminations, self.savedFrames, self.savedFrames / max(self.emulatedFrames + self.savedFrames, 1)))
 
     def addPlayer(self, newPlayer):
         """Adds a new player to the player list of active players in this lobby
@@ -152,13 +356,12 @@ class Lobby():
         isActionable
             A boolean variable describing whether the Agent has control over the given state of the game
         """
-        action = self.environment.get_action_meaning(action)
         if info['round_timer'] == Lobby.ROUND_TIMER_NOT_STARTED:                                                       
             return False
         elif info['status'] == Lobby.JUMPING_STATUS and self.currentJumpFrame <= Lobby.JUMP_LAG:
             self.currentJumpFrame += 1
             return False
-        elif info['status'] == Lobby.JUMPING_STATUS and any([button in action for button in Lobby.ACTION_BUTTONS]):   # Have to manually track if we are in a jumping attack
+        elif info['status'] == Lobby.JUMPING_STATUS and self.environment.has_attack_button[action]:                   # Have to manually track if we are in a jumping attack
             return False
         elif info['status'] not in Lobby.ACTIONABLE_STATUSES:                                                         # Standing, Crouching, or Jumping 
              return False
@@ -179,26 +382,89 @@ class Lobby():
         None
         """
         self.initEnvironment(state)
+        player = self.players[0]
+        # Frames are only kept in the recorded fights of Agents that train on them or when they are written to the dataset
+        prepareObservations = player.requiresObservations or (self.recordingPath is not None and self.recordObservations)
+        lastRecordedObservation = player.prepareObservation(self.lastObservation) if prepareObservations else None
+        if self.recordingPath is not None and self.recorder is None: self.openRecorder(lastRecordedObservation)
+        fightRecorder = self.getFightRecorder(lastRecordedObservation)
+        fightRecorder.start(self.lastInfo, lastRecordedObservation)
         while not self.done:
+            if self.learner is not None: self.learner.applyPublishedWeights()
 
             # action is an iterable object that contains an input buffer representing frame by frame inputs
             # the lobby will run through these inputs and enter each one on the appropriate frames
-            self.lastAction, self.frameInputs = self.players[0].getMove(self.lastObservation, self.lastInfo)
+            start = self.profiler.start()
+            self.lastAction, self.frameInputs = player.getMove(self.lastObservation, self.lastInfo)
+            self.profiler.record(LobbyProfiler.GET_MOVE, start)
 
             # Fully execute frame object and then wait for next actionable state
             self.lastReward = 0
+            emulationStart = time.perf_counter()
             info, obs = self.enterFrameInputs()
             info, obs = self.waitForNextActionableState(info, obs)
+            self.emulationTime += time.perf_counter() - emulationStart
 
             # Record Results
-            self.players[0].recordStep((self.lastObservation, self.lastInfo, self.lastAction, self.lastReward, obs, info, self.done))
+            start = self.profiler.start()
+            recordedObservation = player.prepareObservation(obs) if prepareObservations else None
+            fightRecorder.record(self.lastAction, self.lastReward, info, self.done, recordedObservation)
+            self.profiler.record(LobbyProfiler.RECORD_STEP, start)
             self.lastObservation, self.lastInfo = [obs, info]                   # Overwrite after recording step so Agent remembers the previous state that led to this one
-        
-        self.environment.close()
-        if self.render: self.environment.viewer.close()
+
+        # The whole fight is handed over at once instead of a step tuple per decision
+        fight = fightRecorder.getFight()
+        start = self.profiler.start()
+        if self.learner is None: player.recordFight(fight)
+        else: self.learner.pushFight(fight)
+        self.profiler.record(LobbyProfiler.RECORD_FIGHT, start)
+        if self.recorder is not None:
+            self.recorder.appendFight(fight)
+            self.recorder.flush()
+        if not self.reuseEnvironment: self.closeEnvironment()
+
+    def getFightRecorder(self, observation):
+        """Returns the recorder the next fight is written into, allocating it again if the shape of the prepared frames changed
+
+        Parameters
+        ----------
+        observation
+            The prepared first frame of the fight, or None if no frames are kept
+
+        Returns
+        -------
+        fightRecorder
+            The Lobby's FightRecorder
+        """
+        observationShape = None if observation is None else numpy.shape(observation)
+        if self.fightRecorder is None or self.fightRecorder.observationShape != observationShape:
+            self.fightRecorder = FightRecorder(Lobby.getInfoFields(), observationShape= observationShape)
+        return self.fightRecorder
+
+    def openRecorder(self, observation):
+        """Opens the dataset recorded steps are streamed into
+
+        Parameters
+        ----------
+        observation
+            A prepared frame from the player used to size the frame column, or None if frames are not recorded
+
+        Returns
+        -------
+        None
+        """
+        observationShape = numpy.shape(observation) if self.recordObservations and observation is not None else None
+        self.recorder = TransitionDatasetWriter(self.recordingPath, Lobby.getInfoFields(), observationShape= observationShape)
+
+    def closeRecorder(self):
+        """Finishes the dataset recorded steps were streamed into so it can be trained on"""
+        if self.recorder is None: return
+        self.recorder.close()
+        self.recorder = None
 
     def enterFrameInputs(self):
         """Enter each of the frame inputs in the input buffer inside the last action object supplied by the Agent
+           Unless rendering, the whole buffer is entered by the MacroActionWrapper in one call and only its last frame builds an info and observation
 
         Parameters
         ----------
@@ -211,16 +477,134 @@ class Lobby():
 
         obs
             The image buffer data received from the emulator after entering all input frames
+            None if the frames were fast forwarded, waitForNextActionableState then builds the observation the Agent acts on
         """
+        if not self.render:
+            start = self.profiler.start()
+            obs, reward, self.done, info = self.macroEnvironment.step_frame_inputs(self.frameInputs, observe= not self.fastForward)
+            self.profiler.record(LobbyProfiler.STEP, start)
+            frames = self.macroEnvironment.frames_stepped
+            self.emulatedFrames += frames
+            self.skippedFrames += frames if obs is None else frames - 1
+            self.lastReward += reward
+            return info, obs
+
         for frame in self.frameInputs:
+            start = self.profiler.start()
             obs, tempReward, self.done, info = self.environment.step(frame)
-            if self.done: return info, obs
-            if self.render: 
-                self.environment.render()
-                time.sleep(Lobby.FRAME_RATE)
+            start = self.profiler.record(LobbyProfiler.STEP, start)
+            self.emulatedFrames += 1
             self.lastReward += tempReward
+            if self.done: return info, obs
+            self.renderFrame(obs)
         return info, obs
 
+    def stepWithoutObservation(self, action):
+        """Advances the emulator one frame without building an observation
+
+        Parameters
+        ----------
+        action
+            The discrete action to hold for the frame
+
+        Returns
+        -------
+        reward
+            The reward of the frame
+
+        done
+            Whether the fight is over
+
+        info
+            The RAM info of the frame, decoded by the RamDecoder once it has been checked and otherwise looked up by retro
+        """
+        if self.ramDecoder is None: return self.environment.step_without_observation(action)
+        reward, done, ram = self.environment.step_ram(action)
+        return reward, done, self.ramDecoder.decode(ram)
+
+    def renderFrame(self, obs):
+        """Shows a frame, either by handing it to the display thread or by drawing it and waiting out the frame at the playback speed
+
+        Parameters
+        ----------
+        obs
+            The image buffer of the frame
+
+        Returns
+        -------
+        None
+        """
+        start = self.profiler.start()
+        if self.display is not None:
+            self.display.show(obs)
+            self.profiler.record(LobbyProfiler.RENDER, start)
+            return
+        self.environment.render()
+        start = self.profiler.record(LobbyProfiler.RENDER, start)
+        if self.playbackSpeed:
+            time.sleep(Lobby.FRAME_RATE / self.playbackSpeed)
+            self.profiler.record(LobbyProfiler.SLEEP, start)
+
+    def closeDisplay(self):
+        """Closes the display thread's window once the lobby is done rendering"""
+        if self.display is None: return
+        print('Displayed {0} frames, dropped {1} the display could not keep up with'.format(self.display.shownFrames, self.display.droppedFrames))
+        self.display.close()
+        self.display = None
+
+    def getDecidingRoundReward(self, info):
+        """Works out from the RAM info whether the outcome of the fight is decided, either by a side having won the rounds it needs or by a
+           knock out in the round that gives a side its last needed win, which the game only counts after the knock out animation and win poses
+           The round wins are remembered while both fighters are standing, as a knocked out health lingers after the round has been counted
+
+        Parameters
+        ----------
+        info
+            The ram info of the current frame
+
+        Returns
+        -------
+        reward
+            None if the fight is not decided yet, otherwise the reward reward_script.lua gives for the deciding round and has not given yet
+        """
+        wins, enemyWins = info['matches_won'], info['enemy_matches_won']
+        if wins >= Lobby.WINS_NEEDED or enemyWins >= Lobby.WINS_NEEDED: return 0
+        if info['health'] >= 0 and info['enemy_health'] >= 0:
+            self.roundWins = (wins, enemyWins)
+            return None
+        if self.roundWins is None: return None
+        if info['enemy_health'] < 0 and self.roundWins[0] == Lobby.WINS_NEEDED - 1: return Lobby.ROUND_REWARD
+        if info['health'] < 0 and self.roundWins[1] == Lobby.WINS_NEEDED - 1: return -Lobby.ROUND_REWARD
+        return None
+
+    def endFightIfDecided(self, info):
+        """Ends the fight once its outcome is decided, adding the reward of the deciding round the Agent would otherwise only see once it is counted
+
+        Parameters
+        ----------
+        info
+            The ram info of the current frame
+
+        Returns
+        -------
+        decided
+            Whether the fight was ended
+        """
+        reward = self.getDecidingRoundReward(info)
+        if reward is None: return False
+        self.lastReward += reward
+        self.done = True
+        self.earlyTerminations += 1
+        if self.measureEarlyTermination: self.savedFrames += self.runOutFight()
+        return True
+
+    def runOutFight(self):
+        """Steps the emulator without inputs until retro ends the fight and returns the number of frames that took, at most MAX_RUN_OUT_FRAMES"""
+        for frame in range(1, Lobby.MAX_RUN_OUT_FRAMES + 1):
+            _, done, _ = self.environment.step_without_observation(Lobby.NO_ACTION)
+            if done: return frame
+        return Lobby.MAX_RUN_OUT_FRAMES
+
     def waitForNextActionableState(self, info, obs):
         """Wait for the next game state where the Agent can make an action
 
@@ -241,17 +625,34 @@ class Lobby():
             The image buffer data received from the emulator after finally getting to an actionable state
 
         """
-        while not self.isActionableState(info, action= self.frameInputs[-1]):
-            obs, tempReward, self.done, info = self.environment.step(Lobby.NO_ACTION)
-            if self.done: return info, obs
-            if self.render: self.environment.render()
-            if self.render:
-                self.environment.render()
-                time.sleep(Lobby.FRAME_RATE)
+        skipObservations = self.fastForward and not self.render
+        skipped = False
+        while True:
+            if self.done: break
+            if self.earlyTermination and self.endFightIfDecided(info): break
+            start = self.profiler.start()
+            actionable = self.isActionableState(info, action= self.frameInputs[-1])
+            start = self.profiler.record(LobbyProfiler.ACTIONABLE, start)
+            if actionable: break
+
+            self.emulatedFrames += 1
+            if skipObservations:
+                tempReward, self.done, info = self.stepWithoutObservation(Lobby.NO_ACTION)
+                self.skippedFrames += 1
+                skipped = True
+            else:
+                obs, tempReward, self.done, info = self.environment.step(Lobby.NO_ACTION)
+            start = self.profiler.record(LobbyProfiler.STEP, start)
             self.lastReward += tempReward
+            if self.render and not self.done: self.renderFrame(obs)
+
+        if skipped or obs is None:                                                                     # Only the frame the Agent acts on needs an observation
+            start = self.profiler.start()
+            obs = self.environment.observe()
+            self.profiler.record(LobbyProfiler.OBSERVE, start)
         return info, obs
 
-    def executeTrainingRun(self, review= True, episodes= 1):
+    def executeTrainingRun(self, review= True, episodes= 1, workers= None, asyncLearning= False):
         """The lobby will load each of the saved states to generate data for the agent to train on
             Note: This will only work for single player mode
 
@@ -263,17 +664,168 @@ class Lobby():
         episodes
             An integer that represents the number of game play episodes to go through before training, once through the roster is one episode
 
+        workers
+            An integer number of rollout worker processes to play the save states with in parallel
+            If None or 1 every state is played in this process with this lobby's environment
+
+        asyncLearning
+            A boolean flag that trains the Agent in a background thread while the lobby keeps playing instead of reviewing after each episode
+            Cannot be combined with rollout workers
+
         Returns
         -------
         None
         """
+        if asyncLearning and workers is not None and workers > 1:
+            raise ValueError("Asynchronous learning plays in this process and cannot be combined with rollout workers")
+        if asyncLearning and self.players[0].__class__.__name__ != "Agent" and review == True:
+            self.executeAsyncTrainingRun(episodes)
+            return
+        if workers is not None and workers > 1:
+            self.executeParallelTrainingRun(review, episodes, workers)
+            return
+
         for episodeNumber in range(episodes):
             print('Starting episode', episodeNumber)
+            self.resetFrameCounts()
+            self.profiler.startEpisode()
             for state in Lobby.getStates():
                 self.play(state= state)
+            print('Skipped {0:.1%} of {1} emulated frames without building observations'.format(self.getSkippedFrameFraction(), self.emulatedFrames))
+            if self.earlyTermination: self.reportEarlyTermination()
             
             if self.players[0].__class__.__name__ != "Agent" and review == True: 
+                start = self.profiler.start()
                 self.players[0].reviewFight()
+                self.profiler.record(LobbyProfiler.REVIEW, start)
+            self.profiler.endEpisode(episodeNumber, self.emulatedFrames)
+
+        self.closeEnvironment()
+        self.closeRecorder()
+        self.closeDisplay()
+
+    def executeAsyncTrainingRun(self, episodes):
+        """Plays every episode's save states while an AsyncLearner trains a copy of the Agent in the background
+           Recorded steps go to the learner instead of the Agent's memory and the Agent picks up the learner's
+           published weights between decisions. After each episode the share of wall time the emulator and the
+           learner were busy is reported, a low emulator share means play is waiting on the Agent or the learner
+
+        Parameters
+        ----------
+        episodes
+            An integer that represents the number of game play episodes to go through
+
+        Returns
+        -------
+        None
+        """
+        self.learner = AsyncLearner(self.players[0])
+        self.learner.start()
+        try:
+            for episodeNumber in range(episodes):
+                print('Starting episode', episodeNumber)
+                self.resetFrameCounts()
+                self.learner.resetUtilization()
+                self.profiler.startEpisode()
+                episodeStart = time.perf_counter()
+                for state in Lobby.getStates():
+                    self.play(state= state)
+                elapsed = time.perf_counter() - episodeStart
+                print('Skipped {0:.1%} of {1} emulated frames without building observations'.format(self.getSkippedFrameFraction(), self.emulatedFrames))
+                if self.earlyTermination: self.reportEarlyTermination()
+                print('Emulator busy {0:.1%} and learner busy {1:.1%} of {2:.1f}s, {3} gradient steps, {4} of {5} published weight updates applied'.format(
+                      self.emulationTime / elapsed if elapsed > 0 else 0.0, self.learner.getUtilization(), elapsed, self.learner.gradientSteps,
+                      self.learner.appliedUpdates, self.learner.publishedUpdates))
+                self.profiler.endEpisode(episodeNumber, self.emulatedFrames)
+        finally:
+            self.learner.stop()
+            self.learner = None
+
+        self.closeEnvironment()
+        self.closeRecorder()
+        self.closeDisplay()
+
+    def getWorkerOptions(self):
+        """Returns the constructor arguments a rollout worker's lobby needs to play like this one, leaving out rendering and profiling"""
+        return {'game' : self.game, 'mode' : self.mode, 'reuseEnvironment' : self.reuseEnvironment, 'fastForward' : self.fastForward,
+                'recordingPath' : self.recordingPath, 'recordObservations' : self.recordObservations, 'ramObservations' : self.ramObservations,
+                'decodeRam' : self.decodeRam, 'earlyTermination' : self.earlyTermination, 'measureEarlyTermination' : self.measureEarlyTermination}
+
+    def executeParallelTrainingRun(self, review, episodes, workers):
+        """Plays each episode's save states across a pool of rollout worker processes that each own an emulator
+           Every worker acts with a snapshot of the Agent taken at the start of the episode and sends back
+           its recorded steps, which the Agent in this process imports before reviewing
+
+        Parameters
+        ----------
+        review
+            A boolean variable that tells the Agent whether or not it should train after each episode, true means train
+
+        episodes
+            An integer that represents the number of game play episodes to go through
+
+        workers
+            The number of rollout worker processes to start
+
+        Returns
+        -------
+        None
+        """
+        player = self.players[0]
+        parameters = player.getRolloutParameters()
+        context = multiprocessing.get_context('spawn')                                            # Emulators and tensorflow do not survive being forked
+        initargs = (self.getWorkerOptions(),)
+        with context.Pool(processes= workers, initializer= initializeRolloutWorker, initargs= initargs) as pool:
+            for episodeNumber in range(episodes):
+                print('Starting episode', episodeNumber)
+                snapshot = player.getSnapshot()
+                tasks = [(player.__class__, parameters, snapshot, state) for state in Lobby.getStates()]
+                for batch in pool.imap_unordered(playRolloutState, tasks):
+                    player.importMemory(batch)
+
+                if player.__class__.__name__ != "Agent" and review == True:
+                    player.reviewFight()
+                else:
+                    player.prepareForNextFight()
+
+### Rollout worker functions, these live at module level so worker processes can find them
+
+workerLobby = None                                                                                 # The lobby owned by this rollout worker process
+workerAgent = None                                                                                 # The copy of the learning Agent owned by this rollout worker process
+
+def initializeRolloutWorker(options):
+    """Creates the lobby a rollout worker process plays all of its assigned save states in, from the options of Lobby.getWorkerOptions
+       When recording, each worker streams its steps into its own dataset below the recording path
+    """
+    global workerLobby
+    options = dict(options)
+    if options['recordingPath'] is not None: options['recordingPath'] = os.path.join(options['recordingPath'], 'worker_{0}'.format(os.getpid()))
+    workerLobby = Lobby(render= False, **options)
+
+def playRolloutState(task):
+    """Plays one save state inside a rollout worker process and returns the steps the worker's Agent recorded
+
+    Parameters
+    ----------
+    task
+        A tuple of the Agent class, its constructor parameters, a snapshot of the learning Agent, and the save state to play
+
+    Returns
+    -------
+    batch
+        The recorded steps of the fight as returned by the Agent's exportMemory
+    """
+    global workerAgent
+    agentClass, parameters, snapshot, state = task
+    if workerAgent is None or workerAgent.__class__ is not agentClass:
+        workerAgent = agentClass(**parameters)
+        workerLobby.clearLobby()
+        workerLobby.addPlayer(workerAgent)
+
+    workerAgent.loadSnapshot(snapshot)
+    workerAgent.prepareForNextFight()
+    workerLobby.play(state= state)
+    return workerAgent.exportMemory()
 
 
 # Makes an example lobby and has a random agent play through an example training run
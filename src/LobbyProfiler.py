@@ -0,0 +1,147 @@
+import os, json, time, numpy
+
+class LobbyProfiler():
+    """Times the phases of the Lobby's frame loop and reports where each episode's time went.
+       Every timed call adds its duration to the phase's total, its call count, and a histogram of power of two
+       microsecond buckets, so a report costs nothing extra to build and percentiles can be read off the buckets.
+       Each episode's report is printed and the reports of the run are exported as JSON under local_logs.
+    """
+
+    # Phases of the frame loop that are timed
+    STEP = 'step'                                             # Emulating a frame or a whole move's frames, with or without building an observation
+    OBSERVE = 'observe'                                       # Building the observation of a fast forwarded frame the Agent acts on
+    RENDER = 'render'                                         # Drawing the frame to the screen
+    SLEEP = 'sleep'                                           # Waiting out FRAME_RATE while rendering in real time
+    ACTIONABLE = 'isActionableState'                          # Deciding whether the Agent can act in the current frame
+    GET_MOVE = 'getMove'                                      # The Agent picking its next move
+    RECORD_STEP = 'recordStep'                                # Writing the step into the fight's columns
+    RECORD_FIGHT = 'recordFight'                              # The Agent recording the finished fight for training
+    REVIEW = 'reviewFight'                                    # The Agent training on the episode
+    PHASES = [STEP, OBSERVE, RENDER, SLEEP, ACTIONABLE, GET_MOVE, RECORD_STEP, RECORD_FIGHT, REVIEW]
+
+    HISTOGRAM_BUCKETS = 32                                    # Bucket i counts calls that took less than 2^i microseconds
+    DEFAULT_LOGS_DIR_PATH = '../local_logs'                   # Default path to the dir the reports are exported into
+    REPORT_FILE = 'lobby_profile_{0}.json'                    # Naming scheme of the exported report of a run
+
+    def __init__(self, logsDirectory= DEFAULT_LOGS_DIR_PATH):
+        """Starts an empty profile of a run
+
+        Parameters
+        ----------
+        logsDirectory
+            The directory the JSON report of the run is exported into
+
+        Returns
+        -------
+        None
+        """
+        self.reportPath = os.path.join(logsDirectory, LobbyProfiler.REPORT_FILE.format(time.strftime('%Y%m%d_%H%M%S')))
+        self.reports = []
+        self.startEpisode()
+
+    def startEpisode(self):
+        """Zeroes the counters and starts the wall clock of a new episode"""
+        self.totals = {phase : 0.0 for phase in LobbyProfiler.PHASES}
+        self.calls = {phase : 0 for phase in LobbyProfiler.PHASES}
+        self.histograms = {phase : numpy.zeros(LobbyProfiler.HISTOGRAM_BUCKETS, dtype= numpy.int64) for phase in LobbyProfiler.PHASES}
+        self.episodeStart = time.perf_counter()
+
+    def start(self):
+        """Returns the time a phase starts at, to be handed to record once it finishes"""
+        return time.perf_counter()
+
+    def record(self, phase, start):
+        """Adds the time since start to the phase and returns the current time so the next phase can start from it
+
+        Parameters
+        ----------
+        phase
+            One of PHASES
+
+        start
+            The time the phase started at, as returned by start or a previous record
+
+        Returns
+        -------
+        now
+            The time the phase finished at
+        """
+        now = time.perf_counter()
+        elapsed = now - start
+        self.totals[phase] += elapsed
+        self.calls[phase] += 1
+        bucket = min(int(elapsed * 1e6).bit_length(), LobbyProfiler.HISTOGRAM_BUCKETS - 1)
+        self.histograms[phase][bucket] += 1
+        return now
+
+    def percentile(self, phase, fraction):
+        """Returns the upper bound in microseconds of the histogram bucket holding the given fraction of the phase's calls"""
+        histogram = self.histograms[phase]
+        if self.calls[phase] == 0: return 0
+        bucket = int(numpy.searchsorted(numpy.cumsum(histogram), fraction * self.calls[phase]))
+        return 2 ** bucket
+
+    def endEpisode(self, episodeNumber, frames):
+        """Builds the report of the episode, prints it, and exports the reports of the run so far
+
+        Parameters
+        ----------
+        episodeNumber
+            The number of the episode that finished
+
+        frames
+            The number of frames emulated during the episode, a single step call can emulate a whole move
+
+        Returns
+        -------
+        report
+            A dictionary of the episode's wall time, rates, and per phase timings
+        """
+        elapsed = time.perf_counter() - self.episodeStart
+        phases = {}
+        for phase in LobbyProfiler.PHASES:
+            calls = self.calls[phase]
+            phases[phase] = {'seconds' : self.totals[phase], 'calls' : calls, 'share' : self.totals[phase] / elapsed if elapsed > 0 else 0.0,
+                             'meanMicroseconds' : 1e6 * self.totals[phase] / calls if calls else 0.0,
+                             'p50Microseconds' : self.percentile(phase, 0.5), 'p99Microseconds' : self.percentile(phase, 0.99),
+                             'histogram' : self.histograms[phase].tolist()}
+        playTime = elapsed - self.totals[LobbyProfiler.REVIEW]
+        report = {'episode' : episodeNumber, 'seconds' : elapsed, 'reviewSeconds' : self.totals[LobbyProfiler.REVIEW],
+                  'frames' : frames, 'framesPerSecond' : frames / playTime if playTime > 0 else 0.0,
+                  'decisionsPerSecond' : self.calls[LobbyProfiler.GET_MOVE] / playTime if playTime > 0 else 0.0,
+                  'phases' : phases}
+        self.reports.append(report)
+        self.printReport(report)
+        self.export()
+        return report
+
+    def printReport(self, report):
+        """Prints a table of where the episode's time went"""
+        print('Episode {0} took {1:.1f}s, {2:.0f} frames/s, {3:.1f} decisions/s, {4:.1f}s reviewing'.format(
+              report['episode'], report['seconds'], report['framesPerSecond'], report['decisionsPerSecond'], report['reviewSeconds']))
+        for phase, timing in report['phases'].items():
+            if timing['calls'] == 0: continue
+            print('    {0:<18} {1:>8.2f}s {2:>6.1%} {3:>10} calls {4:>10.1f}us mean {5:>8}us p50 {6:>8}us p99'.format(
+                  phase, timing['seconds'], timing['share'], timing['calls'], timing['meanMicroseconds'], timing['p50Microseconds'], timing['p99Microseconds']))
+
+    def export(self):
+        """Writes the reports of the run so far to the run's JSON file"""
+        os.makedirs(os.path.dirname(self.reportPath), exist_ok= True)
+        with open(self.reportPath, 'w') as file:
+            json.dump(self.reports, file, indent= 4)
+
+
+class NullProfiler():
+    """Stands in for a LobbyProfiler when profiling is off, every call does nothing so the frame loop stays the same"""
+
+    def startEpisode(self):
+        pass
+
+    def start(self):
+        return 0.0
+
+    def record(self, phase, start):
+        return 0.0
+
+    def endEpisode(self, episodeNumber, frames):
+        return None
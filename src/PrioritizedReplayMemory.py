@@ -0,0 +1,107 @@
+import numpy
+from ReplayMemory import ReplayMemory
+from SumTree import SumTree
+
+class PrioritizedReplayMemory(ReplayMemory):
+    """A replay memory that samples transitions in proportion to how wrong the network last was about them.
+       Priorities live in a sum tree so sampling and updating are O(log n), and every minibatch comes with
+       importance sampling weights that correct for the non uniform sampling.
+    """
+
+    DEFAULT_ALPHA = 0.6                                       # How strongly priorities skew sampling, 0 is uniform
+    DEFAULT_BETA = 0.4                                        # Starting strength of the importance sampling correction, annealed to 1
+    DEFAULT_BETA_INCREMENT = 0.0001                           # How much beta grows with each sampled minibatch
+    PRIORITY_EPSILON = 1e-3                                   # Added to every error so no transition stops being sampled
+
+    def __init__(self, capacity, stateSize, observationShape= None, directory= None, alpha= DEFAULT_ALPHA, beta= DEFAULT_BETA, betaIncrement= DEFAULT_BETA_INCREMENT):
+        """Allocates the columns of the replay memory and the sum tree of priorities
+
+        Parameters
+        ----------
+        capacity, stateSize, observationShape, directory
+            See ReplayMemory
+
+        alpha
+            The exponent applied to each error when turning it into a priority
+
+        beta
+            The initial exponent of the importance sampling weights
+
+        betaIncrement
+            The amount beta is raised towards 1 after each sampled minibatch
+
+        Returns
+        -------
+        None
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.betaIncrement = betaIncrement
+        self.tree = SumTree(capacity)
+        super(PrioritizedReplayMemory, self).__init__(capacity, stateSize, observationShape, directory)
+
+    def clear(self):
+        """Forgets every recorded transition and its priority"""
+        super(PrioritizedReplayMemory, self).clear()
+        self.tree.nodes[:] = 0
+        self.maxPriority = 1.0                                 # New transitions get the highest priority seen so they are trained on at least once
+
+    def loadMetadata(self):
+        """Restores a memory mapped memory, the priorities are not saved so every restored transition starts at the same priority"""
+        super(PrioritizedReplayMemory, self).loadMetadata()
+        self.maxPriority = 1.0
+        self.tree.update(self.getIndices(), self.maxPriority)
+
+    def invalidateSlots(self, slots):
+        """Marks the slots as empty and removes them from sampling"""
+        super(PrioritizedReplayMemory, self).invalidateSlots(slots)
+        self.tree.update(numpy.atleast_1d(slots), 0)
+
+    def validateSlots(self, slots):
+        """Marks the slots as holding new transitions and gives them the highest priority seen so far"""
+        super(PrioritizedReplayMemory, self).validateSlots(slots)
+        self.tree.update(numpy.atleast_1d(slots), self.maxPriority)
+
+    def sample(self, batchSize):
+        """Returns the slot indices of a minibatch sampled in proportion to priority"""
+        return self.tree.sample(batchSize)
+
+    def getWeights(self, indices):
+        """Returns the importance sampling weights of the sampled slots, normalized so the largest is 1"""
+        probabilities = self.tree.getPriorities(indices) / self.tree.total()
+        weights = (len(self) * probabilities) ** -self.beta
+        return (weights / weights.max()).astype(numpy.float32)
+
+    def iterateMinibatches(self, batchSize, steps= None):
+        """Yields the slot indices and importance sampling weights of prioritized minibatches, see ReplayMemory.iterateMinibatches"""
+        transitions = len(self)
+        if transitions == 0: return
+        if steps is None: steps = -(-transitions // batchSize)
+        for _ in range(steps):
+            yield self.sampleMinibatch(batchSize)
+
+    def sampleMinibatch(self, batchSize):
+        """Returns the slot indices and importance sampling weights of a prioritized minibatch and anneals beta towards 1"""
+        indices = self.sample(batchSize)
+        weights = self.getWeights(indices)
+        self.beta = min(1.0, self.beta + self.betaIncrement)
+        return indices, weights
+
+    def updatePriorities(self, indices, errors):
+        """Sets the priorities of the trained slots from the absolute temporal difference errors the network made on them
+
+        Parameters
+        ----------
+        indices
+            The slot indices of the trained minibatch
+
+        errors
+            The temporal difference error of each transition in the minibatch
+
+        Returns
+        -------
+        None
+        """
+        priorities = (numpy.abs(errors) + PrioritizedReplayMemory.PRIORITY_EPSILON) ** self.alpha
+        self.tree.update(indices, priorities)
+        self.maxPriority = max(self.maxPriority, float(priorities.max()))
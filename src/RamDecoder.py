@@ -0,0 +1,159 @@
+import sys, numpy
+
+class RamDecoder():
+    """Decodes every RAM variable declared in data.json straight from the emulator's RAM buffer in one vectorized pass.
+       The bytes of all variables are gathered out of the RAM with a single index array, already in native byte
+       order, into the layout of a structured dtype holding each variable as a native typed field, so viewing the
+       gathered bytes through the dtype decodes every integer variable at once. Retro's decimal types are binary
+       coded decimal and are converted through a lookup table of the value of each byte.
+       A single RAM buffer decodes into a record indexable by field name like retro's info dictionary, a stack of
+       buffers into one record per frame or a column per field.
+       Some cores keep their RAM as byte swapped 16 bit words, forEnvironment checks the decoded values against
+       retro's own lookup to find out which layout the emulator uses.
+    """
+
+    RAM_BASE = 0xFF0000                                       # Address the Genesis work RAM returned by get_ram starts at
+    SWAPPED_WORD_MASK = 1                                     # XORed into a byte's offset to find it when words are byte swapped
+    DECIMAL_BYTE_VALUES = numpy.array([(byte >> 4) * 10 + (byte & 0xF) for byte in range(256)], dtype= numpy.int64)    # Value of each pair of decimal digits
+
+    def __init__(self, variables, swapped= False, base= RAM_BASE):
+        """Builds the gather index and dtype of the variables
+
+        Parameters
+        ----------
+        variables
+            The dictionary of RAM variables from data.json, each with an address and a type such as >u2 or >d4
+
+        swapped
+            Whether the RAM holds 16 bit words with their bytes swapped
+
+        base
+            The address of the first byte of the RAM buffers that will be decoded
+
+        Returns
+        -------
+        None
+        """
+        self.swapped = swapped
+        self.fields = RamDecoder.getFields(variables)
+        self.dtype = numpy.dtype(self.fields)                 # Native typed record of every variable, the same layout FightRecorder stores
+        sourceBytes, targetBytes = [], []                     # RAM offset of each byte of the integer variables and its offset in a record
+        self.decimalFields = []                               # Name, record offset, RAM offsets and place values of each decimal variable
+        for name, variable in variables.items():
+            kind, size = RamDecoder.parseType(variable['type'])
+            offsets = numpy.arange(size) + variable['address'] - base                              # Most significant byte first
+            if swapped: offsets ^= RamDecoder.SWAPPED_WORD_MASK
+            recordOffset = self.dtype.fields[name][1]
+            if kind == 'd':
+                self.decimalFields.append((name, recordOffset, offsets, 100 ** numpy.arange(size - 1, -1, -1, dtype= numpy.int64)))
+                continue
+            if sys.byteorder == 'little': offsets = offsets[::-1]
+            sourceBytes.append(offsets)
+            targetBytes.append(recordOffset + numpy.arange(size))
+        self.sourceBytes = numpy.concatenate(sourceBytes)
+        self.targetBytes = numpy.concatenate(targetBytes)
+        self.decimalByteValues = RamDecoder.DECIMAL_BYTE_VALUES.tolist()                           # Indexed by single bytes where a list is faster than numpy
+
+    @staticmethod
+    def parseType(declared):
+        """Static method that splits a data.json type such as >u2 into its kind and its size in bytes
+
+        Parameters
+        ----------
+        declared
+            The type string of the variable
+
+        Returns
+        -------
+        kind
+            One of u, i or d for unsigned, signed and binary coded decimal values
+
+        size
+            The number of bytes the variable spans
+        """
+        kind, size = declared[1], int(declared[2:])
+        if kind not in 'uid' or size not in (1, 2, 4, 8): raise ValueError('Unsupported RAM variable type ' + declared)
+        return kind, size
+
+    @staticmethod
+    def getFields(variables):
+        """Static method that returns the (name, numpy dtype) pairs the variables are decoded into, in the order they are declared
+           Integer variables keep their declared size in native byte order, decimal and nibble types become int64
+        """
+        fields = []
+        for name, variable in variables.items():
+            declared = variable['type']
+            kind, size = declared[1], int(declared[2:])
+            if kind in 'ui': fields.append((name, numpy.dtype(kind + str(size))))
+            else: fields.append((name, numpy.dtype(numpy.int64)))
+        return fields
+
+    @staticmethod
+    def forEnvironment(environment, variables):
+        """Static method that builds a decoder for a retro environment after checking it against retro's lookup of the current frame
+
+        Parameters
+        ----------
+        environment
+            The unwrapped retro environment, it needs get_ram and data.lookup_all
+
+        variables
+            The dictionary of RAM variables from data.json
+
+        Returns
+        -------
+        decoder
+            A RamDecoder for the layout whose values match retro's, or None if no layout or both layouts match
+            Both can match on frames where every variable reads the same either way, so the check is worth repeating on a later frame
+        """
+        try:
+            ram, info = environment.get_ram(), environment.data.lookup_all()
+            decoders = [RamDecoder(variables, swapped= swapped) for swapped in [False, True]]
+            matching = [decoder for decoder in decoders if decoder.matches(ram, info)]
+        except (AttributeError, ValueError, IndexError, KeyError):
+            return None
+        return matching[0] if len(matching) == 1 else None
+
+    def matches(self, ram, info):
+        """Returns whether every variable decoded from the RAM equals its value in the info dictionary"""
+        record = self.decode(ram)
+        return all(record[name] == info[name] for name, _ in self.fields)
+
+    def decodeRecords(self, rams):
+        """Decodes a stack of RAM buffers
+
+        Parameters
+        ----------
+        rams
+            A uint8 array with one RAM buffer per row
+
+        Returns
+        -------
+        records
+            A structured array of dtype self.dtype with one record per buffer
+        """
+        rams = numpy.asarray(rams)
+        buffer = numpy.empty((len(rams), self.dtype.itemsize), dtype= numpy.uint8)
+        buffer[:, self.targetBytes] = rams[:, self.sourceBytes]
+        for _, recordOffset, offsets, placeValues in self.decimalFields:
+            buffer[:, recordOffset : recordOffset + 8].view(numpy.int64)[:, 0] = RamDecoder.DECIMAL_BYTE_VALUES[rams[:, offsets]] @ placeValues
+        return buffer.view(self.dtype)[:, 0]
+
+    def decode(self, ram):
+        """Decodes a single RAM buffer into a record indexable by field name like retro's info dictionary
+           Called every frame, so it skips the batch dimension and adds up the few decimal bytes in python
+        """
+        buffer = numpy.empty(self.dtype.itemsize, dtype= numpy.uint8)
+        buffer[self.targetBytes] = ram[self.sourceBytes]
+        record = buffer.view(self.dtype)[0]
+        for name, _, offsets, _ in self.decimalFields:
+            value = 0
+            for byte in ram[offsets].tolist():
+                value = value * 100 + self.decimalByteValues[byte]
+            record[name] = value
+        return record
+
+    def decodeBatch(self, rams):
+        """Decodes a stack of RAM buffers into a dictionary mapping each field name to its column, as taken by FeatureEncoder.encodeBatch"""
+        records = self.decodeRecords(rams)
+        return {name : records[name] for name, _ in self.fields}
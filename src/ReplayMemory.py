@@ -0,0 +1,310 @@
+import os, json, numpy
+
+class ReplayMemory():
+    """A ring buffer of transitions stored in preallocated numpy columns.
+       States are written once into a state column and each transition points at the slot holding its next state,
+       so consecutive decisions in a fight share their state rows. Recording a step is a constant time slot write
+       and sampling a minibatch is a fancy index into the columns.
+       When given a directory the columns are memory mapped .npy files inside it, so the memory survives the process
+       and is restored the next time a memory is made with that directory. Once full the oldest slots are evicted first.
+       The ring position is saved along with the columns on every flush and whenever the ring wraps around, and it is
+       replaced in one step so a crash never leaves a half written position behind.
+    """
+
+    STATE_DTYPE = numpy.float32                               # Data type of the stored state features
+    OBSERVATION_DTYPE = numpy.uint8                           # Data type of the stored observations
+    METADATA_FILE = 'metadata.json'                           # Name of the file holding the ring position of a memory mapped memory
+
+    def __init__(self, capacity, stateSize, observationShape= None, directory= None):
+        """Allocates the columns of the replay memory
+
+        Parameters
+        ----------
+        capacity
+            The maximum number of state slots the memory holds before the oldest are overwritten
+
+        stateSize
+            The number of features in each stored state
+
+        observationShape
+            The shape of the observation stored alongside each state, if None no observations are stored
+
+        directory
+            A directory to keep the columns in as memory mapped files, if None the columns are held in RAM
+            If the directory already holds a memory of the same shape it is restored
+
+        Returns
+        -------
+        None
+        """
+        self.capacity = capacity
+        self.stateSize = stateSize
+        self.observationShape = observationShape
+        self.directory = directory
+        restore = directory is not None and os.path.exists(os.path.join(directory, ReplayMemory.METADATA_FILE))
+        if directory is not None: os.makedirs(directory, exist_ok= True)
+
+        self.states = self.allocateColumn('states', (capacity, stateSize), ReplayMemory.STATE_DTYPE, restore)
+        self.actions = self.allocateColumn('actions', (capacity,), numpy.int64, restore)
+        self.rewards = self.allocateColumn('rewards', (capacity,), numpy.float32, restore)
+        self.nextIndices = self.allocateColumn('nextIndices', (capacity,), numpy.int64, restore)
+        self.dones = self.allocateColumn('dones', (capacity,), numpy.bool_, restore)
+        self.valid = self.allocateColumn('valid', (capacity,), numpy.bool_, restore)   # Marks the slots that hold the start of a recorded transition
+        if observationShape is None: self.observations = None
+        else: self.observations = self.allocateColumn('observations', (capacity,) + tuple(observationShape), ReplayMemory.OBSERVATION_DTYPE, restore)
+
+        if restore: self.loadMetadata()
+        else: self.clear()
+
+    def allocateColumn(self, name, shape, dtype, restore):
+        """Returns a zeroed column, or a memory mapped one inside the memory's directory
+
+        Parameters
+        ----------
+        name
+            The name of the column, used as the file name when memory mapped
+
+        shape
+            The shape of the column
+
+        dtype
+            The data type of the column
+
+        restore
+            Whether to open the column already saved in the directory instead of making a new one
+
+        Returns
+        -------
+        column
+            The allocated column
+        """
+        if self.directory is None: return numpy.zeros(shape, dtype= dtype)
+        path = os.path.join(self.directory, name + '.npy')
+        if not restore: return numpy.lib.format.open_memmap(path, mode= 'w+', dtype= dtype, shape= shape)
+
+        column = numpy.load(path, mmap_mode= 'r+')
+        if column.shape != tuple(shape) or column.dtype != numpy.dtype(dtype):
+            raise ValueError("Replay memory column {0} has shape {1} and type {2}, expected {3} and {4}".format(path, column.shape, column.dtype, tuple(shape), numpy.dtype(dtype)))
+        return column
+
+    def loadMetadata(self):
+        """Restores the ring position of a memory mapped memory from its metadata file"""
+        with open(os.path.join(self.directory, ReplayMemory.METADATA_FILE), 'r') as file:
+            metadata = json.load(file)
+        self.position = metadata['position']
+        self.slotsUsed = metadata['slotsUsed']
+        self.lastNextIndex = metadata['lastNextIndex']
+
+    def flush(self):
+        """Writes the columns and ring position of a memory mapped memory to disk, does nothing for a memory held in RAM"""
+        if self.directory is None: return
+        columns = [self.states, self.actions, self.rewards, self.nextIndices, self.dones, self.valid]
+        if self.observations is not None: columns.append(self.observations)
+        for column in columns:
+            column.flush()
+        metadata = {'position' : self.position, 'slotsUsed' : self.slotsUsed, 'lastNextIndex' : self.lastNextIndex}
+        path = os.path.join(self.directory, ReplayMemory.METADATA_FILE)
+        with open(path + '.tmp', 'w') as file:
+            json.dump(metadata, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + '.tmp', path)
+
+    def clear(self):
+        """Forgets every recorded transition without releasing the preallocated columns"""
+        self.position = 0                                      # The next slot that will be written to
+        self.slotsUsed = 0                                     # The number of slots that have been written to at least once
+        self.lastNextIndex = None                              # The slot holding the next state of the last recorded transition
+        self.valid[:] = False
+
+    def __len__(self):
+        """Returns the number of transitions currently held in memory"""
+        return int(numpy.count_nonzero(self.valid))
+
+    def writeSlot(self, state, observation= None):
+        """Writes a state into the next slot of the ring and returns the index of that slot"""
+        index = self.position
+        self.states[index] = state
+        if self.observations is not None and observation is not None: self.observations[index] = observation
+        self.invalidateSlots(index)                            # Any transition that started at this slot has been overwritten
+        self.position = (index + 1) % self.capacity
+        self.slotsUsed = min(self.slotsUsed + 1, self.capacity)
+        if self.position == 0: self.flush()                    # Wrapping starts overwriting the oldest slots
+        return index
+
+    def append(self, state, action, reward, nextState, done, observation= None, nextObservation= None):
+        """Records a single transition
+
+        Parameters
+        ----------
+        state
+            The feature vector of the state the Agent was presented with
+
+        action
+            Integer representing the move the Agent chose
+
+        reward
+            The reward the Agent received for that move
+
+        nextState
+            The feature vector of the state the move led to
+
+        done
+            Whether or not the next state ended the fight
+
+        observation
+            The optional observation of the state, only stored if the memory was built with an observation shape
+
+        nextObservation
+            The optional observation of the next state
+
+        Returns
+        -------
+        None
+        """
+        # When the state is the next state of the last transition the slot already holding it is reused
+        if self.lastNextIndex is not None and numpy.array_equal(self.states[self.lastNextIndex], state):
+            index = self.lastNextIndex
+        else:
+            index = self.writeSlot(state, observation)
+        nextIndex = self.writeSlot(nextState, nextObservation)
+
+        self.actions[index] = action
+        self.rewards[index] = reward
+        self.nextIndices[index] = nextIndex
+        self.dones[index] = done
+        self.validateSlots(index)
+        self.lastNextIndex = None if done else nextIndex
+
+    def invalidateSlots(self, slots):
+        """Marks the given slots as no longer holding the start of a transition"""
+        self.valid[slots] = False
+
+    def validateSlots(self, slots):
+        """Marks the given slots as holding the start of a freshly recorded transition"""
+        self.valid[slots] = True
+
+    def getIndices(self):
+        """Returns the slot indices of every transition currently held in memory"""
+        return numpy.flatnonzero(self.valid)
+
+    def getBatch(self, indices):
+        """Gathers the transitions starting at the given slots
+
+        Parameters
+        ----------
+        indices
+            An array of slot indices as returned by getIndices or sample
+
+        Returns
+        -------
+        batch
+            A tuple of the states, actions, rewards, dones, and next states of the transitions
+        """
+        return (self.states[indices], self.actions[indices], self.rewards[indices],
+                self.dones[indices], self.states[self.nextIndices[indices]])
+
+    def sample(self, batchSize):
+        """Returns the slot indices of a uniformly sampled minibatch of transitions"""
+        indices = self.getIndices()
+        return indices[numpy.random.randint(0, len(indices), size= batchSize)]
+
+    def sampleMinibatch(self, batchSize):
+        """Returns the slot indices and importance sampling weights of a single sampled minibatch, see iterateMinibatches"""
+        return self.sample(batchSize), None
+
+    def iterateMinibatches(self, batchSize, steps= None):
+        """Yields the slot indices of minibatches drawn from shuffled passes over every transition in memory
+
+        Parameters
+        ----------
+        batchSize
+            The number of transitions in each minibatch
+
+        steps
+            The number of minibatches to yield, if None a single pass is made over the memory
+
+        Returns
+        -------
+        minibatches
+            A generator of tuples of slot indices and importance sampling weights, the weights are None for uniform sampling
+        """
+        indices = self.getIndices()
+        if len(indices) == 0: return
+        if steps is None: steps = -(-len(indices) // batchSize)
+        order = numpy.random.permutation(indices)
+        position = 0
+        for _ in range(steps):
+            if position >= len(order):                         # Start a new shuffled pass once the memory is exhausted
+                order = numpy.random.permutation(indices)
+                position = 0
+            yield order[position : position + batchSize], None
+            position += batchSize
+
+    def updatePriorities(self, indices, errors):
+        """Informs the memory of the temporal difference errors of a trained minibatch, uniform memories ignore them"""
+        pass
+
+    def getTransitions(self):
+        """Returns every transition held in memory as a tuple of stacked arrays, see getBatch"""
+        return self.getBatch(self.getIndices())
+
+    def nbytes(self):
+        """Returns the number of bytes allocated for the columns of the memory"""
+        columns = [self.states, self.actions, self.rewards, self.nextIndices, self.dones, self.valid]
+        if self.observations is not None: columns.append(self.observations)
+        return sum(column.nbytes for column in columns)
+
+    def extend(self, transitions):
+        """Records a batch of transitions at once, such as the ones returned by getTransitions in another process
+           Consecutive transitions whose next state is the following state share a slot just like with append
+
+        Parameters
+        ----------
+        transitions
+            A tuple of the stacked states, actions, rewards, dones, and next states of the transitions, see getBatch
+
+        Returns
+        -------
+        None
+        """
+        states, actions, rewards, dones, nextStates = transitions
+        if len(actions) == 0: return
+
+        # A state needs its own slot unless it is the next state of the transition before it
+        needsSlot = numpy.ones(len(actions), dtype= numpy.bool_)
+        needsSlot[1:] = ~(numpy.all(nextStates[:-1] == states[1:], axis= 1) & ~dones[:-1])
+        ends = numpy.cumsum(needsSlot.astype(numpy.int64) + 1)
+        # Only the newest transitions that fit in the ring are kept, leaving room for the slot a continued state sits in
+        limit = self.capacity - 1
+        if ends[-1] > limit:
+            first = int(numpy.searchsorted(ends, ends[-1] - limit + 1)) + 1
+            states, actions, rewards, dones, nextStates = states[first:], actions[first:], rewards[first:], dones[first:], nextStates[first:]
+            needsSlot = needsSlot[first:]
+            needsSlot[0] = True
+            self.lastNextIndex = None
+
+        continuesLast = self.lastNextIndex is not None and numpy.array_equal(self.states[self.lastNextIndex], states[0])
+        needsSlot[0] = not continuesLast
+        ends = numpy.cumsum(needsSlot.astype(numpy.int64) + 1)
+        nextOffsets = ends - 1
+        stateOffsets = numpy.where(needsSlot, ends - 2, numpy.roll(nextOffsets, 1))
+        rows = numpy.zeros((ends[-1], self.stateSize), dtype= ReplayMemory.STATE_DTYPE)
+        rows[nextOffsets] = nextStates
+        rows[stateOffsets[needsSlot]] = states[needsSlot]
+
+        slots = (self.position + numpy.arange(ends[-1])) % self.capacity
+        self.states[slots] = rows
+        self.invalidateSlots(slots)
+        stateSlots = slots[stateOffsets]
+        if continuesLast: stateSlots[0] = self.lastNextIndex
+        self.actions[stateSlots] = actions
+        self.rewards[stateSlots] = rewards
+        self.nextIndices[stateSlots] = slots[nextOffsets]
+        self.dones[stateSlots] = dones
+        self.validateSlots(stateSlots)
+        wrapped = self.position + ends[-1] >= self.capacity
+        self.position = int((self.position + ends[-1]) % self.capacity)
+        self.slotsUsed = min(self.slotsUsed + int(ends[-1]), self.capacity)
+        self.lastNextIndex = None if dones[-1] else int(slots[nextOffsets[-1]])
+        if wrapped: self.flush()                               # Wrapping starts overwriting the oldest slots
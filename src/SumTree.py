@@ -0,0 +1,86 @@
+import numpy
+
+class SumTree():
+    """A binary tree stored in a flat array where every node holds the sum of the priorities below it.
+       Leaves are the priorities of the replay memory slots, so both sampling a slot in proportion to its
+       priority and updating a priority take O(log n). Batches of samples and updates are processed together
+       one tree level at a time.
+    """
+
+    def __init__(self, capacity):
+        """Allocates a tree with at least capacity leaves, all starting at a priority of zero
+
+        Parameters
+        ----------
+        capacity
+            The number of priorities the tree holds
+
+        Returns
+        -------
+        None
+        """
+        self.capacity = capacity
+        self.leafCount = 1
+        while self.leafCount < capacity: self.leafCount *= 2                 # A power of two keeps every leaf at the same depth
+        self.depth = int(numpy.log2(self.leafCount))
+        self.nodes = numpy.zeros(2 * self.leafCount, dtype= numpy.float64)   # Node 1 is the root and the children of node i are 2i and 2i + 1
+
+    def total(self):
+        """Returns the sum of every priority in the tree"""
+        return self.nodes[1]
+
+    def getPriorities(self, indices):
+        """Returns the priorities stored at the given leaf indices"""
+        return self.nodes[self.leafCount + numpy.asarray(indices)]
+
+    def update(self, indices, priorities):
+        """Sets the priorities of the given leaf indices and recomputes the sums above them
+
+        Parameters
+        ----------
+        indices
+            An array of leaf indices
+
+        priorities
+            An array of the new priorities, or a single priority for all of them
+
+        Returns
+        -------
+        None
+        """
+        nodes = self.leafCount + numpy.asarray(indices, dtype= numpy.int64)
+        if len(nodes) == 0: return
+        self.nodes[nodes] = priorities
+        nodes = numpy.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.nodes[nodes] = self.nodes[2 * nodes] + self.nodes[2 * nodes + 1]
+            nodes = numpy.unique(nodes // 2)
+
+    def find(self, values):
+        """Finds the leaf each value falls into when the leaves are laid end to end by priority
+
+        Parameters
+        ----------
+        values
+            An array of values between zero and the total priority
+
+        Returns
+        -------
+        indices
+            The leaf index each value landed in
+        """
+        values = numpy.minimum(numpy.asarray(values, dtype= numpy.float64), numpy.nextafter(self.total(), 0))
+        nodes = numpy.ones(len(values), dtype= numpy.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            leftSums = self.nodes[left]
+            goRight = values >= leftSums
+            values = values - numpy.where(goRight, leftSums, 0)
+            nodes = left + goRight
+        return nodes - self.leafCount
+
+    def sample(self, batchSize):
+        """Samples leaf indices in proportion to their priority, one from each equal slice of the total priority"""
+        segment = self.total() / batchSize
+        values = (numpy.arange(batchSize) + numpy.random.rand(batchSize)) * segment
+        return self.find(values)
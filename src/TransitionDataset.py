@@ -0,0 +1,253 @@
+import os, json, numpy
+
+class TransitionDatasetWriter():
+    """Streams recorded steps to disk as a chunked columnar dataset that can be trained on without the emulator.
+       Every column of a chunk is a memory mapped .npy file, the RAM info of the state and next state are stored
+       field by field as typed columns so any Agent can build its own features from them. The metadata file is
+       rewritten whenever a chunk fills up or the writer is flushed, so a dataset is readable even if the process
+       recording it is killed.
+    """
+
+    DEFAULT_CHUNK_SIZE = 65536                                # Number of steps stored in each chunk
+    METADATA_FILE = 'metadata.json'                           # Name of the file describing the columns and chunks of a dataset
+    CHUNK_DIR = 'chunk_{0:05d}'                               # Naming scheme of the chunk directories
+    STATE_PREFIX = 'state_'                                   # Prefix of the RAM info columns of the state the Agent acted in
+    NEXT_STATE_PREFIX = 'next_state_'                         # Prefix of the RAM info columns of the state the action led to
+
+    def __init__(self, directory, infoFields, observationShape= None, chunkSize= DEFAULT_CHUNK_SIZE):
+        """Opens a dataset for writing, continuing after the last chunk if the directory already holds one
+
+        Parameters
+        ----------
+        directory
+            The directory the dataset is written into
+
+        infoFields
+            A list of (name, dtype) pairs of the RAM info fields to record, see Lobby.getInfoFields
+
+        observationShape
+            The shape of the frame stored with each step, if None no frames are stored
+
+        chunkSize
+            The number of steps stored in each chunk
+
+        Returns
+        -------
+        None
+        """
+        self.directory = directory
+        self.infoFields = infoFields
+        self.chunkSize = chunkSize
+        os.makedirs(directory, exist_ok= True)
+
+        self.columns = [('action', numpy.dtype(numpy.int64)), ('reward', numpy.dtype(numpy.float32)), ('done', numpy.dtype(numpy.bool_))]
+        for prefix in [TransitionDatasetWriter.STATE_PREFIX, TransitionDatasetWriter.NEXT_STATE_PREFIX]:
+            self.columns += [(prefix + name, numpy.dtype(dtype)) for name, dtype in infoFields]
+        self.observationShape = None if observationShape is None else tuple(observationShape)
+
+        self.chunkRows = []                                   # Number of steps held by each finished chunk
+        metadataPath = os.path.join(directory, TransitionDatasetWriter.METADATA_FILE)
+        if os.path.exists(metadataPath):
+            with open(metadataPath, 'r') as file:
+                metadata = json.load(file)
+            savedShape = None if metadata['observationShape'] is None else tuple(metadata['observationShape'])
+            if savedShape != self.observationShape or metadata['columns'] != [[name, dtype.str] for name, dtype in self.columns]:
+                raise ValueError("The dataset in {0} was recorded with different columns or frame shape".format(directory))
+            self.chunkRows = metadata['chunkRows']
+        self.chunk = None
+
+    def openChunk(self):
+        """Creates the memory mapped column files of the next chunk"""
+        chunkPath = os.path.join(self.directory, TransitionDatasetWriter.CHUNK_DIR.format(len(self.chunkRows)))
+        os.makedirs(chunkPath, exist_ok= True)
+        self.chunk = {}
+        for name, dtype in self.columns:
+            self.chunk[name] = numpy.lib.format.open_memmap(os.path.join(chunkPath, name + '.npy'), mode= 'w+', dtype= dtype, shape= (self.chunkSize,))
+        if self.observationShape is not None:
+            self.chunk['observation'] = numpy.lib.format.open_memmap(os.path.join(chunkPath, 'observation.npy'), mode= 'w+', dtype= numpy.uint8,
+                                                                     shape= (self.chunkSize,) + self.observationShape)
+        self.rows = 0
+
+    def append(self, state, action, reward, nextState, done, observation= None):
+        """Writes one recorded step into the current chunk
+
+        Parameters
+        ----------
+        state
+            The RAM info dictionary of the state the Agent acted in
+
+        action
+            Integer representing the move the Agent chose
+
+        reward
+            The reward the Agent received for that move
+
+        nextState
+            The RAM info dictionary of the state the move led to
+
+        done
+            Whether or not the next state ended the fight
+
+        observation
+            The optional frame of the state, only stored if the writer was given an observation shape
+
+        Returns
+        -------
+        None
+        """
+        if self.chunk is None: self.openChunk()
+
+        row = self.rows
+        self.chunk['action'][row] = action
+        self.chunk['reward'][row] = reward
+        self.chunk['done'][row] = done
+        for name, _ in self.infoFields:
+            self.chunk[TransitionDatasetWriter.STATE_PREFIX + name][row] = state[name]
+            self.chunk[TransitionDatasetWriter.NEXT_STATE_PREFIX + name][row] = nextState[name]
+        if 'observation' in self.chunk and observation is not None: self.chunk['observation'][row] = observation
+        self.rows += 1
+
+        if self.rows == self.chunkSize:
+            self.chunkRows.append(self.rows)
+            self.closeChunk()
+
+    def appendFight(self, fight):
+        """Writes every decision of a fight recorded by a FightRecorder, a slice of each column at a time
+
+        Parameters
+        ----------
+        fight
+            A RecordedFight whose info columns hold the fields this writer records
+
+        Returns
+        -------
+        None
+        """
+        written = 0
+        while written < len(fight):
+            if self.chunk is None: self.openChunk()
+            count = min(len(fight) - written, self.chunkSize - self.rows)
+            rows, steps = slice(self.rows, self.rows + count), slice(written, written + count)
+            self.chunk['action'][rows] = fight.actions[steps]
+            self.chunk['reward'][rows] = fight.rewards[steps]
+            self.chunk['done'][rows] = fight.dones[steps]
+            for name, _ in self.infoFields:
+                self.chunk[TransitionDatasetWriter.STATE_PREFIX + name][rows] = fight.states[name][steps]
+                self.chunk[TransitionDatasetWriter.NEXT_STATE_PREFIX + name][rows] = fight.nextStates[name][steps]
+            if 'observation' in self.chunk and fight.observations is not None: self.chunk['observation'][rows] = fight.observations[steps]
+            self.rows += count
+            written += count
+
+            if self.rows == self.chunkSize:
+                self.chunkRows.append(self.rows)
+                self.closeChunk()
+
+    def closeChunk(self):
+        """Flushes the current chunk's columns to disk and records the dataset's metadata"""
+        for column in self.chunk.values():
+            column.flush()
+        self.chunk = None
+        self.writeMetadata()
+
+    def writeMetadata(self, partialRows= 0):
+        """Writes the description of the columns and chunks, counting a partially filled current chunk if given"""
+        chunkRows = self.chunkRows + ([partialRows] if partialRows else [])
+        metadata = {'columns' : [[name, dtype.str] for name, dtype in self.columns], 'infoFields' : [name for name, _ in self.infoFields],
+                    'chunkSize' : self.chunkSize, 'chunkRows' : chunkRows, 'observationShape' : self.observationShape}
+        path = os.path.join(self.directory, TransitionDatasetWriter.METADATA_FILE)
+        with open(path + '.tmp', 'w') as file:                                                     # Replaced in one step so a crash never leaves it half written
+            json.dump(metadata, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + '.tmp', path)
+
+    def flush(self):
+        """Makes every step written so far readable, the current chunk keeps filling after this"""
+        if self.chunk is None: return
+        for column in self.chunk.values():
+            column.flush()
+        self.writeMetadata(partialRows= self.rows)
+
+    def close(self):
+        """Finishes the current chunk so the next writer on this directory starts a new one"""
+        if self.chunk is None: return
+        if self.rows > 0: self.chunkRows.append(self.rows)
+        self.closeChunk()
+
+
+class TransitionDataset():
+    """Reads a dataset written by TransitionDatasetWriter chunk by chunk through memory maps"""
+
+    def __init__(self, directory):
+        """Opens the dataset in the directory
+
+        Parameters
+        ----------
+        directory
+            The directory of a dataset, as given to TransitionDatasetWriter
+
+        Returns
+        -------
+        None
+        """
+        self.directory = directory
+        with open(os.path.join(directory, TransitionDatasetWriter.METADATA_FILE), 'r') as file:
+            metadata = json.load(file)
+        self.columnNames = [name for name, _ in metadata['columns']]
+        self.infoFields = metadata['infoFields']
+        self.chunkRows = metadata['chunkRows']
+        self.hasObservations = metadata['observationShape'] is not None
+
+    def findDatasets(directory):
+        """Static method that returns every dataset directory at or below the given directory, such as one per rollout worker"""
+        datasets = []
+        for root, dirs, files in os.walk(directory):
+            if TransitionDatasetWriter.METADATA_FILE in files:
+                datasets.append(root)
+                dirs[:] = []                                   # Chunks live below a dataset, there is no need to look inside them
+        return sorted(datasets)
+
+    def __len__(self):
+        """Returns the number of steps in the dataset"""
+        return sum(self.chunkRows)
+
+    def getChunk(self, chunkIndex):
+        """Returns a dictionary of the memory mapped columns of a chunk, trimmed to the steps it holds
+
+        Parameters
+        ----------
+        chunkIndex
+            The index of the chunk to open
+
+        Returns
+        -------
+        chunk
+            A dictionary mapping column names to read only arrays
+        """
+        chunkPath = os.path.join(self.directory, TransitionDatasetWriter.CHUNK_DIR.format(chunkIndex))
+        rows = self.chunkRows[chunkIndex]
+        names = self.columnNames + (['observation'] if self.hasObservations else [])
+        return {name : numpy.load(os.path.join(chunkPath, name + '.npy'), mmap_mode= 'r')[:rows] for name in names}
+
+    def chunks(self):
+        """Yields every chunk of the dataset in the order it was written, see getChunk"""
+        for chunkIndex in range(len(self.chunkRows)):
+            yield self.getChunk(chunkIndex)
+
+    def getInfoColumns(self, chunk, prefix= TransitionDatasetWriter.STATE_PREFIX):
+        """Returns the RAM info columns of a chunk keyed by their data.json field name
+
+        Parameters
+        ----------
+        chunk
+            A chunk returned by getChunk
+
+        prefix
+            STATE_PREFIX for the states the Agent acted in or NEXT_STATE_PREFIX for the states the actions led to
+
+        Returns
+        -------
+        columns
+            A dictionary mapping each info field to its column
+        """
+        return {field : chunk[prefix + field] for field in self.infoFields}
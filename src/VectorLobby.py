@@ -0,0 +1,231 @@
+import argparse, time, numpy, multiprocessing
+from Lobby import Lobby, Lobby_Modes
+from FightRecorder import FightRecorder
+
+class VectorLobby(Lobby):
+    """A lobby that plays several save states at once, each in an emulator owned by its own subprocess since retro
+       allows a single emulator per process. The environments advance in lockstep one decision at a time: the Agent
+       is asked for a move in every environment with a single call to getMoves, and each worker then enters its move's
+       frame inputs and waits for its own next actionable state independently before reporting back. A finished
+       environment starts on the next save state of the episode while the others keep playing.
+       Each environment records its fight into its own FightRecorder, handed to the player once the fight is over.
+    """
+
+    DEFAULT_ENVIRONMENTS = 4                                  # Number of emulator subprocesses the lobby steps together
+
+    # Commands sent to the environment workers
+    RESET = 'reset'
+    STEP = 'step'
+    CLOSE = 'close'
+
+    def __init__(self, game= 'StreetFighterIISpecialChampionEdition-Genesis', mode= Lobby_Modes.SINGLE_PLAYER, environments= DEFAULT_ENVIRONMENTS, fastForward= True, earlyTermination= False):
+        """Initializes the lobby, the environment workers are only started when a training run begins
+
+        Parameters
+        ----------
+        game
+            Path to the game file, default to the Street Fighter 2 file in the repo
+
+        mode
+            An enum type that describes whether this lobby is for single player or two player matches
+
+        environments
+            The number of emulator subprocesses to play save states in at the same time
+
+        fastForward
+            A boolean flag that lets each worker step through frames the Agent cannot act in without building observations
+
+        earlyTermination
+            A boolean flag that has each worker end its fight on the frame the outcome is decided, see Lobby
+
+        Returns
+        -------
+        None
+        """
+        super(VectorLobby, self).__init__(game= game, render= False, mode= mode, fastForward= fastForward, earlyTermination= earlyTermination)
+        self.environmentCount = environments
+        self.connections = []
+        self.workers = []
+
+    def startWorkers(self, count, sendObservations):
+        """Starts the environment worker processes and keeps a pipe to each of them
+
+        Parameters
+        ----------
+        count
+            The number of workers to start
+
+        sendObservations
+            Whether the workers send back the frame of each actionable state, only needed by Agents that require observations
+
+        Returns
+        -------
+        None
+        """
+        context = multiprocessing.get_context('spawn')                                            # Emulators and tensorflow do not survive being forked
+        for _ in range(count):
+            connection, workerConnection = context.Pipe()
+            worker = context.Process(target= runEnvironmentWorker, args= (workerConnection, self.game, self.mode, self.fastForward, self.earlyTermination, sendObservations), daemon= True)
+            worker.start()
+            workerConnection.close()
+            self.connections.append(connection)
+            self.workers.append(worker)
+
+    def closeWorkers(self):
+        """Shuts down the environment worker processes"""
+        for connection in self.connections:
+            connection.send((VectorLobby.CLOSE, None))
+            connection.close()
+        for worker in self.workers:
+            worker.join()
+        self.connections = []
+        self.workers = []
+
+    def resetEnvironments(self, slots, states):
+        """Loads a save state into each of the given environments and returns their first actionable info and observation"""
+        for slot, state in zip(slots, states):
+            self.connections[slot].send((VectorLobby.RESET, state))
+        return [self.connections[slot].recv() for slot in slots]
+
+    def playStates(self, states):
+        """Plays every save state across the environment workers, recording each fight for the lobby's player
+
+        Parameters
+        ----------
+        states
+            A list of the names of the save states to play
+
+        Returns
+        -------
+        decisions
+            The number of moves the player made
+        """
+        player = self.players[0]
+        keepObservations = player.requiresObservations
+        pending = list(states)
+        slotCount = min(len(self.connections), len(pending))
+        infos = [None] * slotCount                                                                # Info of the state each environment's player acts in next, None once idle
+        observations = [None] * slotCount
+        recordedObservations = [None] * slotCount
+        fightRecorders = [None] * slotCount
+
+        def startFights(slots):
+            slots = slots[:len(pending)]
+            started = self.resetEnvironments(slots, [pending.pop(0) for _ in slots])
+            for slot, (info, obs) in zip(slots, started):
+                infos[slot], observations[slot] = info, obs
+                recordedObservations[slot] = player.prepareObservation(obs) if keepObservations else None
+                if fightRecorders[slot] is None:
+                    observationShape = numpy.shape(recordedObservations[slot]) if keepObservations else None
+                    fightRecorders[slot] = FightRecorder(Lobby.getInfoFields(), observationShape= observationShape)
+                fightRecorders[slot].start(info, recordedObservations[slot])
+
+        startFights(list(range(slotCount)))
+        decisions = 0
+        while any(info is not None for info in infos):
+            active = [slot for slot in range(slotCount) if infos[slot] is not None]
+            moves = player.getMoves([observations[slot] for slot in active], [infos[slot] for slot in active])
+            for slot, (_, frameInputs) in zip(active, moves):
+                self.connections[slot].send((VectorLobby.STEP, frameInputs))
+
+            finished = []
+            for slot, (move, _) in zip(active, moves):
+                info, reward, done, obs = self.connections[slot].recv()
+                recordedObservation = player.prepareObservation(obs) if keepObservations else None
+                fightRecorders[slot].record(move, reward, info, done, recordedObservation)
+                infos[slot], observations[slot], recordedObservations[slot] = info, obs, recordedObservation
+                if done:
+                    player.recordFight(fightRecorders[slot].getFight())
+                    infos[slot] = None
+                    finished.append(slot)
+            decisions += len(active)
+            if finished and pending: startFights(finished)
+        return decisions
+
+    def executeTrainingRun(self, review= True, episodes= 1):
+        """The lobby plays every save state each episode spread across its environments, then has the Agent review them
+
+        Parameters
+        ----------
+        review
+            A boolean variable that tells the Agent whether or not it should train after running through all the save states, true means train
+
+        episodes
+            An integer that represents the number of game play episodes to go through before training, once through the roster is one episode
+
+        Returns
+        -------
+        None
+        """
+        states = Lobby.getStates()
+        self.startWorkers(min(self.environmentCount, len(states)), self.players[0].requiresObservations)
+        try:
+            for episodeNumber in range(episodes):
+                print('Starting episode', episodeNumber)
+                start = time.perf_counter()
+                decisions = self.playStates(states)
+                elapsed = time.perf_counter() - start
+                print('Made {0} decisions across {1} environments in {2:.1f}s'.format(decisions, len(self.connections), elapsed))
+
+                if self.players[0].__class__.__name__ != "Agent" and review == True:
+                    self.players[0].reviewFight()
+        finally:
+            self.closeWorkers()
+
+### Environment worker function, lives at module level so worker processes can find it
+
+def runEnvironmentWorker(connection, game, mode, fastForward, earlyTermination, sendObservations):
+    """Owns one emulator inside a worker process and carries out the commands of a VectorLobby
+
+    Parameters
+    ----------
+    connection
+        The worker's end of the pipe to the VectorLobby
+
+    game
+        Path to the game file
+
+    mode
+        An enum type that describes whether the lobby is for single player or two player matches
+
+    fastForward
+        A boolean flag that steps through frames the Agent cannot act in without building observations
+
+    earlyTermination
+        A boolean flag that ends each fight on the frame its outcome is decided
+
+    sendObservations
+        Whether to send back the frame of each actionable state
+
+    Returns
+    -------
+    None
+    """
+    lobby = Lobby(game= game, render= False, mode= mode, fastForward= fastForward, ramObservations= not sendObservations,
+                  earlyTermination= earlyTermination)
+    while True:
+        command, argument = connection.recv()
+        if command == VectorLobby.RESET:
+            lobby.initEnvironment(argument)
+            connection.send((lobby.lastInfo, lobby.lastObservation if sendObservations else None))
+        elif command == VectorLobby.STEP:
+            lobby.frameInputs = argument
+            lobby.lastReward = 0
+            info, obs = lobby.enterFrameInputs()
+            info, obs = lobby.waitForNextActionableState(info, obs)
+            lobby.lastInfo = info
+            connection.send((info, lobby.lastReward, lobby.done, obs if sendObservations else None))
+        elif command == VectorLobby.CLOSE:
+            lobby.closeEnvironment()
+            connection.close()
+            return
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description= 'Processes agent parameters.')
+    parser.add_argument('-e', '--episodes', type= int, default= 1, help= 'Intger representing the number of training rounds to go through, checkpoints are made at the end of each episode')
+    parser.add_argument('-v', '--environments', type= int, default= VectorLobby.DEFAULT_ENVIRONMENTS, help= 'Integer number of emulator subprocesses stepped together')
+    args = parser.parse_args()
+    from Agent import Agent
+    vectorLobby = VectorLobby(environments= args.environments)
+    vectorLobby.addPlayer(Agent())
+    vectorLobby.executeTrainingRun(episodes= args.episodes)
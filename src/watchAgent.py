@@ -4,10 +4,11 @@ from DeepQAgent import *
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description= 'Processes agent parameters.')
     parser.add_argument('-n', '--name', type= str, default= None, help= 'Name of the instance that will be used when saving the model or it\'s training logs')
+    parser.add_argument('-s', '--speed', type= float, default= 1.0, help= 'How many times faster than real time to play the fights back, 0 plays them as fast as possible')
     args = parser.parse_args()
     qAgent = DeepQAgent(load= True, epsilon= 0, name= args.name)
 
     from Lobby import Lobby
-    testLobby = Lobby(render= True)
+    testLobby = Lobby(render= True, displayThread= True, playbackSpeed= args.speed)
     testLobby.addPlayer(qAgent)
     testLobby.executeTrainingRun(review= False)